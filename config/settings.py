@@ -6,6 +6,7 @@ from pathlib import Path
 import os
 from dotenv import load_dotenv
 import ssl
+from celery.schedules import crontab
 import cloudinary
 import cloudinary.uploader
 import cloudinary.api
@@ -304,13 +305,66 @@ CELERY_BROKER_URL = os.getenv('REDIS_URL', 'redis://localhost:6379/0')
 CELERY_RESULT_BACKEND = os.getenv('REDIS_URL', 'redis://localhost:6379/0')
 REDIS_URL = os.getenv('REDIS_URL', 'redis://localhost:6379/0')
 
+# Shared cache in Redis. 'local' is a small per-process LRU that
+# directory.cache_utils puts in front of it for versioned keys, whose values
+# never change once written; invalidation goes through the version stamps
+# kept in the shared cache.
+CACHES = {
+    'default': {
+        'BACKEND': 'django_redis.cache.RedisCache',
+        'LOCATION': os.getenv('CACHE_REDIS_URL', REDIS_URL),
+        'KEY_PREFIX': 'bizdirectory',
+        'TIMEOUT': 300,
+        'OPTIONS': {
+            'CLIENT_CLASS': 'django_redis.client.DefaultClient',
+            'SOCKET_CONNECT_TIMEOUT': 2,
+            'SOCKET_TIMEOUT': 2,
+            # A Redis outage degrades to cache misses instead of errors
+            'IGNORE_EXCEPTIONS': True,
+        },
+    },
+    'local': {
+        'BACKEND': 'django.core.cache.backends.locmem.LocMemCache',
+        'LOCATION': 'bizdirectory-local',
+        'TIMEOUT': 60,
+        'OPTIONS': {
+            'MAX_ENTRIES': 2000,
+        },
+    },
+}
+
 # For debug, allow long timeout
 CELERY_TASK_SOFT_TIME_LIMIT = 300
 CELERY_TASK_TIME_LIMIT = 600
 
+# Periodic tasks, run with `celery -A config beat`
+CELERY_BEAT_SCHEDULE = {
+    'sweep-expired-subscriptions': {
+        'task': 'directory.signals.sweep_expired_subscriptions',
+        'schedule': 15 * 60,
+    },
+    'refresh-related-businesses': {
+        'task': 'directory.signals.refresh_related_businesses_task',
+        'schedule': 30 * 60,
+    },
+    'rebuild-related-businesses': {
+        'task': 'directory.signals.rebuild_related_businesses_task',
+        'schedule': crontab(hour=3, minute=0),
+    },
+    # Keep in step with directory.homepage.HOMEPAGE_REFRESH_INTERVAL
+    'refresh-homepage-payload': {
+        'task': 'directory.signals.refresh_homepage_payload_task',
+        'schedule': 60,
+    },
+}
+
 # Google Maps Configuration
 GOOGLE_MAPS_API_KEY = os.getenv('GOOGLE_MAPS_API_KEY', '')
 
+# Serve radius searches from the in-process NumPy engine (directory.nearby)
+# instead of per-row SQL trigonometry
+NEARBY_ENGINE_ENABLED = os.getenv('NEARBY_ENGINE_ENABLED', 'False').lower() == 'true'
+
 SOCIALACCOUNT_PROVIDERS = {
     'google': {
         'APP': {
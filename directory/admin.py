@@ -1,6 +1,11 @@
 from django.contrib import admin
-from django.db.models import Avg
-from .models import Category, Business, BusinessImage, BusinessHours, Service, Review, Enquiry, SubscriptionPlan, UserSubscription
+from django.contrib import messages
+from django.db.models import Count, Q
+from .models import Category, Business, BusinessImage, BusinessHours, Service, Review, Enquiry, SubscriptionPlan, UserSubscription, Locality
+from .ratings import approve_review_queryset
+from .facets import invalidate_listing_facets
+from .listing_query import invalidate_listing_results
+from .cache_utils import business_tag, invalidate_tags
 from django.utils import timezone
 from datetime import timedelta
 from django.utils.html import format_html
@@ -17,13 +22,20 @@ class CategoryAdmin(admin.ModelAdmin):
         return "No image"
     image_preview.short_description = "Image Preview"
     
+    def get_queryset(self, request):
+        # Count active businesses for the whole changelist in one query
+        return super().get_queryset(request).annotate(
+            active_business_count=Count('business', filter=Q(business__is_active=True))
+        )
+    
     def business_count(self, obj):
-        return Business.objects.filter(category=obj, is_active=True).count()
+        return obj.active_business_count
     business_count.short_description = "Active Businesses"
+    business_count.admin_order_field = 'active_business_count'
 
 @admin.register(Business)
 class BusinessAdmin(admin.ModelAdmin):
-    list_display = ('name', 'category', 'is_active', 'gst_verified', 'kyc_status', 'owner')
+    list_display = ('name', 'category', 'is_active', 'gst_verified', 'kyc_status', 'avg_rating', 'approved_review_count', 'owner')
     list_filter = ('is_active', 'gst_verified', 'kyc_status', 'category')
     search_fields = ('name', 'description', 'address')
     
@@ -62,13 +74,14 @@ class ServiceAdmin(admin.ModelAdmin):
 
 @admin.action(description="Approve selected reviews")
 def approve_reviews(modeladmin, request, queryset):
-    queryset.update(is_approved=True)
-    
-    # Update average ratings for affected businesses
-    business_ids = queryset.values_list('business_id', flat=True).distinct()
-    for business_id in business_ids:
-        business = Business.objects.get(id=business_id)
-        # Update business average rating if you store this as a field
+    # Approve and update the stored rating aggregates of affected businesses
+    business_ids = set(queryset.filter(is_approved=False).values_list('business_id', flat=True))
+    approved = approve_review_queryset(queryset)
+    if approved:
+        invalidate_listing_facets()
+        invalidate_listing_results()
+        invalidate_tags(*(business_tag(business_id) for business_id in business_ids))
+    modeladmin.message_user(request, f"{approved} reviews approved.")
 
 @admin.register(Review)
 class ReviewAdmin(admin.ModelAdmin):
@@ -91,6 +104,20 @@ class EnquiryAdmin(admin.ModelAdmin):
     search_fields = ('business__name', 'name', 'email', 'message')
     actions = [mark_as_responded]
 
+@admin.register(Locality)
+class LocalityAdmin(admin.ModelAdmin):
+    # Maintained by signals and the rebuild_localities command
+    list_display = ('name', 'kind', 'city', 'state', 'pincode', 'business_count')
+    list_filter = ('kind', 'state')
+    search_fields = ('name', 'city', 'pincode')
+    readonly_fields = ('kind', 'name', 'search_name', 'city', 'state', 'pincode', 'business_count')
+
+    def has_add_permission(self, request):
+        return False
+
+    def has_delete_permission(self, request, obj=None):
+        return False
+
 @admin.register(SubscriptionPlan)
 class SubscriptionPlanAdmin(admin.ModelAdmin):
     list_display = ('name', 'price', 'duration_days')
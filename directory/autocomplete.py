@@ -0,0 +1,278 @@
+"""
+In-process autocomplete index for search suggestions.
+
+Holds a sorted array of word suffixes (searched with bisect) plus trigram
+postings for substring matches. Local changes are applied incrementally and
+announced through a cache version stamp so other workers rebuild, at most
+once per MIN_REBUILD_INTERVAL.
+"""
+import re
+import threading
+import time
+from bisect import bisect_left, insort
+from dataclasses import dataclass
+
+from .cache_utils import get_cache_version, bump_cache_version
+from .models import Business, Category, Service
+
+VERSION_NAME = 'autocomplete_index'
+VERSION_CHECK_INTERVAL = 5  # seconds between shared version checks
+MIN_REBUILD_INTERVAL = 60   # seconds between rebuilds triggered by other workers
+MAX_PREFIX_SCAN = 500
+
+# Lower sorts first among equally good matches
+KIND_ORDER = {'category': 0, 'business': 1, 'service': 2}
+
+_non_word = re.compile(r'[^\w]+')
+
+
+def normalize(text):
+    """Lowercase and collapse punctuation/whitespace to single spaces"""
+    return _non_word.sub(' ', (text or '').lower()).strip()
+
+def _trigrams(text):
+    return {text[i:i + 3] for i in range(len(text) - 2)}
+
+def _word_suffixes(norm):
+    """'acme plumbers' -> ['acme plumbers', 'plumbers']"""
+    suffixes = [norm]
+    for match in re.finditer(r' ', norm):
+        suffixes.append(norm[match.end():])
+    return suffixes
+
+
+@dataclass
+class Suggestion:
+    kind: str
+    label: str
+    norm: str
+    weight: int = 0
+    object_id: int = None
+
+    def as_dict(self):
+        return {'label': self.label, 'value': self.label, 'type': self.kind}
+
+
+class AutocompleteIndex:
+    def __init__(self):
+        self._lock = threading.RLock()
+        self._entries = {}
+        self._prefix = []
+        self._trigrams = {}
+        # Incremental bookkeeping for service names shared across businesses
+        self._business_services = {}
+        self._service_refs = {}
+        self._built = False
+        self._bulk_loading = False
+        self._version = None
+        self._checked_at = 0.0
+        self._built_at = 0.0
+
+    # ------------------------------------------------------------------
+    # Index maintenance
+    # ------------------------------------------------------------------
+    def _add(self, key, suggestion):
+        self._entries[key] = suggestion
+        for suffix in _word_suffixes(suggestion.norm):
+            if self._bulk_loading:
+                self._prefix.append((suffix, key))
+            else:
+                insort(self._prefix, (suffix, key))
+        for trigram in _trigrams(suggestion.norm):
+            self._trigrams.setdefault(trigram, set()).add(key)
+
+    def _remove(self, key):
+        suggestion = self._entries.pop(key, None)
+        if suggestion is None:
+            return
+        for suffix in _word_suffixes(suggestion.norm):
+            position = bisect_left(self._prefix, (suffix, key))
+            if position < len(self._prefix) and self._prefix[position] == (suffix, key):
+                del self._prefix[position]
+        for trigram in _trigrams(suggestion.norm):
+            postings = self._trigrams.get(trigram)
+            if postings is not None:
+                postings.discard(key)
+                if not postings:
+                    del self._trigrams[trigram]
+
+    def _add_service_ref(self, label):
+        norm = normalize(label)
+        if not norm:
+            return
+        key = ('service', norm)
+        count = self._service_refs.get(norm, 0) + 1
+        self._service_refs[norm] = count
+        if key in self._entries:
+            self._entries[key].weight = count
+        else:
+            self._add(key, Suggestion('service', label, norm, count))
+
+    def _drop_service_ref(self, norm):
+        key = ('service', norm)
+        count = self._service_refs.get(norm, 0) - 1
+        if count > 0:
+            self._service_refs[norm] = count
+            self._entries[key].weight = count
+        else:
+            self._service_refs.pop(norm, None)
+            self._remove(key)
+
+    def _set_business(self, business_id, name, weight, service_names):
+        self._remove(('business', business_id))
+        for norm in self._business_services.pop(business_id, ()):
+            self._drop_service_ref(norm)
+
+        if name is None:
+            return
+        norm = normalize(name)
+        if norm:
+            self._add(('business', business_id), Suggestion('business', name, norm, weight, business_id))
+        service_norms = set()
+        for label in service_names:
+            service_norm = normalize(label)
+            if service_norm and service_norm not in service_norms:
+                service_norms.add(service_norm)
+                self._add_service_ref(label)
+        self._business_services[business_id] = service_norms
+
+    def _set_category(self, category_id, name):
+        self._remove(('category', category_id))
+        norm = normalize(name)
+        if name is not None and norm:
+            self._add(('category', category_id), Suggestion('category', name, norm, 0, category_id))
+
+    def rebuild(self, version=None):
+        """Rebuild the whole index from the database"""
+        services = {}
+        for business_id, name in Service.objects.filter(
+            business__is_active=True
+        ).values_list('business_id', 'name'):
+            services.setdefault(business_id, []).append(name)
+        businesses = list(Business.objects.filter(is_active=True).values_list(
+            'id', 'name', 'approved_review_count'
+        ))
+        categories = list(Category.objects.values_list('id', 'name'))
+
+        with self._lock:
+            self._entries = {}
+            self._prefix = []
+            self._trigrams = {}
+            self._business_services = {}
+            self._service_refs = {}
+            # Append everything, then sort the prefix array once
+            self._bulk_loading = True
+            try:
+                for business_id, name, weight in businesses:
+                    self._set_business(business_id, name, weight, services.get(business_id, ()))
+                for category_id, name in categories:
+                    self._set_category(category_id, name)
+            finally:
+                self._bulk_loading = False
+            self._prefix.sort()
+            self._built = True
+            self._version = version if version is not None else get_cache_version(VERSION_NAME)
+            self._built_at = self._checked_at = time.monotonic()
+
+    def _publish(self):
+        """Announce a local change so other workers rebuild"""
+        version = bump_cache_version(VERSION_NAME)
+        if self._version is not None and version == self._version + 1:
+            self._version = version
+        else:
+            # Someone else changed things too; rebuild on next lookup
+            self._version = None
+            self._checked_at = 0.0
+
+    def business_changed(self, business_id):
+        with self._lock:
+            if self._built:
+                row = Business.objects.filter(pk=business_id, is_active=True).values_list(
+                    'name', 'approved_review_count'
+                ).first()
+                if row:
+                    service_names = Service.objects.filter(
+                        business_id=business_id
+                    ).values_list('name', flat=True)
+                    self._set_business(business_id, row[0], row[1], service_names)
+                else:
+                    self._set_business(business_id, None, 0, ())
+            self._publish()
+
+    def category_changed(self, category_id):
+        with self._lock:
+            if self._built:
+                name = Category.objects.filter(pk=category_id).values_list('name', flat=True).first()
+                self._set_category(category_id, name)
+            self._publish()
+
+    # ------------------------------------------------------------------
+    # Lookups
+    # ------------------------------------------------------------------
+    def _ensure_current(self):
+        now = time.monotonic()
+        if self._built and self._version is not None and now - self._checked_at < VERSION_CHECK_INTERVAL:
+            return
+        self._checked_at = now
+        if not self._built:
+            self.rebuild()
+            return
+        version = get_cache_version(VERSION_NAME)
+        if version != self._version and (
+            self._version is None or now - self._built_at >= MIN_REBUILD_INTERVAL
+        ):
+            self.rebuild(version)
+
+    def current_version(self):
+        """Version stamp of the index lookups are served from"""
+        self._ensure_current()
+        return self._version
+
+    def search(self, term, limit=10, kinds=None):
+        """Top `limit` suggestions for a partially typed term"""
+        query = normalize(term)
+        if not query:
+            return []
+        self._ensure_current()
+
+        with self._lock:
+            scored = {}
+            position = bisect_left(self._prefix, (query,))
+            end = min(len(self._prefix), position + MAX_PREFIX_SCAN)
+            while position < end:
+                suffix, key = self._prefix[position]
+                if not suffix.startswith(query):
+                    break
+                suggestion = self._entries[key]
+                # 0 = whole label starts with the term, 1 = a later word does
+                score = 0 if suggestion.norm.startswith(query) else 1
+                if score < scored.get(key, 2):
+                    scored[key] = score
+                position += 1
+
+            if len(scored) < limit and len(query) >= 3:
+                postings = sorted(
+                    (self._trigrams.get(trigram, set()) for trigram in _trigrams(query)),
+                    key=len
+                )
+                candidates = set(postings[0]).intersection(*postings[1:]) if postings else set()
+                for key in candidates:
+                    if key not in scored and query in self._entries[key].norm:
+                        scored[key] = 2
+
+            results = [
+                (score, self._entries[key]) for key, score in scored.items()
+                if kinds is None or self._entries[key].kind in kinds
+            ]
+
+        results.sort(key=lambda item: (
+            item[0], KIND_ORDER[item[1].kind], -item[1].weight, len(item[1].label), item[1].label
+        ))
+        return [suggestion for _, suggestion in results[:limit]]
+
+
+autocomplete_index = AutocompleteIndex()
+
+def get_suggestions(term, limit=10, kinds=None):
+    """Suggestion dicts ({'label', 'value', 'type'}) for the search box"""
+    return [suggestion.as_dict() for suggestion in autocomplete_index.search(term, limit, kinds)]
@@ -1,36 +1,206 @@
-from django.core.cache import cache
-from django.db.models import Count, Q, Avg
-from .models import Category, Business
-
-def get_cached_categories():
-    """Get categories with caching"""
-    cache_key = 'home_categories'
-    categories = cache.get(cache_key)
-    
-    if categories is None:
-        categories = list(Category.objects.annotate(
-            business_count=Count('business', filter=Q(business__is_active=True))
-        ).filter(business_count__gt=0)[:8])
-        cache.set(cache_key, categories, 300)  # Cache for 5 minutes
-    
-    return categories
+import logging
+import math
+import random
+import threading
+import time
+from django.core.cache import cache, caches
+from django.db import close_old_connections
+
+logger = logging.getLogger(__name__)
+
+# Per-process LRU tier (settings.CACHES['local']) for versioned keys
+local_cache = caches['local']
+LOCAL_CACHE_TTL = 60
+
+BUILD_LOCK_TIMEOUT = 30  # seconds a crashed builder can hold a key's lock
+BUILD_POLL = 0.05
+
+# Tags shared by entries across modules; per-object tags come from
+# business_tag() and category_tag()
+LISTINGS_TAG = 'listings'      # which businesses are listed, and their ratings
+CATEGORIES_TAG = 'categories'  # category names and active business counts
+RELATED_TAG = 'related'        # the whole RelatedBusiness table
+
+# Stamps this process uses while the shared cache is unreachable, so keys
+# stay stable instead of reseeding from the clock on every read
+_outage_versions = {}
 
-def get_cached_featured_businesses():
-    """Get featured businesses with caching"""
-    cache_key = 'featured_businesses'
-    businesses = cache.get(cache_key)
+def get_cache_version(name):
+    """Get the current version stamp for a family of cached entries"""
+    cache_key = f'version:{name}'
+    version = cache.get(cache_key)
     
-    if businesses is None:
-        businesses = list(Business.objects.select_related(
-            'category', 'owner'
-        ).prefetch_related(
-            'images'
-        ).filter(
-            is_active=True
-        ).annotate(
-            avg_rating=Avg('reviews__rating'),
-            review_count=Count('reviews')
-        )[:8])
-        cache.set(cache_key, businesses, 600)  # Cache for 10 minutes
+    if version is None:
+        # Seed from the clock so an evicted stamp never revives old entries
+        seed = int(time.time() * 1000)
+        if cache.add(cache_key, seed, None) is None:
+            # IGNORE_EXCEPTIONS turned a backend error into None
+            return _outage_versions.setdefault(name, seed)
+        version = cache.get(cache_key, seed)
     
-    return businesses
\ No newline at end of file
+    return version
+
+def bump_cache_version(name):
+    """Invalidate every entry keyed on this version stamp"""
+    cache_key = f'version:{name}'
+    try:
+        version = cache.incr(cache_key)
+    except ValueError:
+        # Stamp expired or was never set
+        version = int(time.time() * 1000)
+        cache.set(cache_key, version, None)
+        return version
+    if version is None:
+        # Backend unreachable; at least this process stops using old entries
+        version = _outage_versions[name] = _outage_versions.get(name, int(time.time() * 1000)) + 1
+    return version
+
+def business_tag(business_id):
+    return f'business:{business_id}'
+
+def category_tag(category_id):
+    return f'category:{category_id}'
+
+def get_tag_versions(tags):
+    """{tag: version stamp} for the given tags, read in one round trip"""
+    keys = {f'version:{tag}': tag for tag in tags}
+    found = cache.get_many(list(keys))
+    return {
+        tag: found[key] if found.get(key) is not None else get_cache_version(tag)
+        for key, tag in keys.items()
+    }
+
+def invalidate_tags(*tags):
+    """Invalidate every entry registered under any of these tags"""
+    for tag in set(tags):
+        bump_cache_version(tag)
+
+def tiered_get(key):
+    """Value of a versioned key from this process or the shared cache, or None"""
+    value = local_cache.get(key)
+    if value is None:
+        value = cache.get(key)
+        if value is not None:
+            local_cache.set(key, value, LOCAL_CACHE_TTL)
+    return value
+
+def tiered_set(key, value, timeout):
+    """Store a versioned key in the shared cache and this process"""
+    cache.set(key, value, timeout)
+    local_cache.set(key, value, min(timeout, LOCAL_CACHE_TTL))
+
+def _read_entry(key, local):
+    if local:
+        entry = local_cache.get(key)
+        if entry is not None:
+            return entry
+    entry = cache.get(key)
+    if entry is not None and local:
+        local_cache.set(key, entry, LOCAL_CACHE_TTL)
+    return entry
+
+def _acquire(key):
+    """Take a key's build lock: True, False if another worker holds it, None if the backend is down"""
+    return cache.add(f'{key}:lock', 1, BUILD_LOCK_TIMEOUT)
+
+def _is_current(entry):
+    """Whether none of the tags an entry was built under have been bumped since"""
+    versions = entry[3] if len(entry) > 3 else None
+    return not versions or get_tag_versions(versions) == versions
+
+def refresh_cached(key, ttl, builder, stale_ttl=0, local=False, tags=()):
+    """Run builder() and store the result as a cached() entry, e.g. from a scheduled task"""
+    tags = tags if callable(tags) else tuple(tags)
+    # Static tags are read first, so a bump during the build still
+    # invalidates the result
+    versions = get_tag_versions(tags) if tags and not callable(tags) else {}
+    started = time.monotonic()
+    value = builder()
+    build_time = time.monotonic() - started
+    if callable(tags):
+        versions = get_tag_versions(tags(value))
+    entry = (value, time.time() + ttl, build_time, versions)
+    cache.set(key, entry, ttl + stale_ttl)
+    if local:
+        local_cache.set(key, entry, min(ttl + stale_ttl, LOCAL_CACHE_TTL))
+    return value
+
+def _build(key, ttl, builder, stale_ttl, local, tags):
+    """Run builder() under the key's lock (already held) and store the result"""
+    try:
+        return refresh_cached(key, ttl, builder, stale_ttl, local, tags)
+    finally:
+        cache.delete(f'{key}:lock')
+
+def _build_in_background(key, ttl, builder, stale_ttl, local, tags):
+    def run():
+        try:
+            _build(key, ttl, builder, stale_ttl, local, tags)
+        except Exception:
+            logger.exception(f"Background rebuild of cache key {key} failed")
+        finally:
+            close_old_connections()
+    threading.Thread(target=run, daemon=True).start()
+
+def cached(key, ttl, builder, stale_ttl=0, beta=1.0, local=False, tags=()):
+    """
+    Cached value of builder() under key, rebuilt by one caller at a time.
+
+    Entries remember when they expire and how long they took to build. Each
+    read recomputes early with a probability that rises as expiry nears and
+    with the build time (beta scales it), so a busy key is normally refreshed
+    by a single request before it expires. Only the holder of the key's lock
+    runs builder(); others keep the current value or wait for the new one,
+    taking the lock over if it is released or expires without a result, so
+    a slow build is never run by every waiting caller. With stale_ttl, an expired value is still served for that long while
+    a background thread rebuilds it. local=True also keeps entries in the
+    per-process tier, for versioned or tagged keys only.
+
+    tags (or a function of the built value returning them) register the
+    entry under invalidate_tags(): the tag versions are stored with it and
+    an entry whose tags have moved on is treated as missing, never stale.
+    """
+    tags = tags if callable(tags) else tuple(tags)
+    entry = _read_entry(key, local)
+    if entry is not None and not _is_current(entry):
+        entry = None
+    if entry is not None:
+        value, expires_at, build_time = entry[:3]
+        now = time.time()
+        if now - build_time * beta * math.log(1.0 - random.random()) < expires_at:
+            return value
+        if now < expires_at or stale_ttl:
+            if _acquire(key):
+                if stale_ttl:
+                    _build_in_background(key, ttl, builder, stale_ttl, local, tags)
+                else:
+                    return _build(key, ttl, builder, stale_ttl, local, tags)
+            return value
+
+    acquired = _acquire(key)
+    if acquired is None:
+        # No shared cache to coordinate through, so there is nobody to wait for
+        return builder()
+    if acquired:
+        return _build(key, ttl, builder, stale_ttl, local, tags)
+
+    # Another worker is building this key. Wait for its result; if its lock
+    # goes away without one (the build failed, or the worker died and the
+    # lock expired) the next caller to take the lock builds instead
+    deadline = time.monotonic() + BUILD_LOCK_TIMEOUT + BUILD_POLL
+    while time.monotonic() < deadline:
+        time.sleep(BUILD_POLL)
+        entry = cache.get(key)
+        if entry is not None and _is_current(entry):
+            return entry[0]
+        acquired = _acquire(key)
+        if acquired is None:
+            return builder()
+        if acquired:
+            # The result may have landed between the read and the lock
+            entry = cache.get(key)
+            if entry is not None and _is_current(entry):
+                cache.delete(f'{key}:lock')
+                return entry[0]
+            return _build(key, ttl, builder, stale_ttl, local, tags)
+    return builder()
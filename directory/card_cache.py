@@ -0,0 +1,60 @@
+"""
+Rendered HTML of the listing card partials, cached per business.
+
+A card only changes with its business, images, services or rating (all of
+which bump the business tag) or a category rename (the categories tag), so
+each variant's fragment is keyed on the business id and those two tag
+versions. A page of cards is one get_many for the tag versions and one for
+the fragments; only the misses are loaded from the database and rendered.
+"""
+from django.core.cache import cache
+from django.template.loader import render_to_string
+from django.utils.safestring import mark_safe
+from .cache_utils import CATEGORIES_TAG, business_tag, get_tag_versions
+
+CARD_CACHE_TTL = 60 * 60 * 6  # Tagged, so the TTL only bounds memory
+CARD_TEMPLATES = {
+    'desktop': 'directory/partials/desktop_business_card.html',
+    'mobile': 'directory/partials/mobile_business_card.html',
+}
+
+
+def business_cards(business_ids, load_businesses):
+    """
+    {variant: [card html, ...]} in business_ids order. load_businesses(ids)
+    returns the Business objects for cards that have to be rendered; ids it
+    doesn't return (no longer active) are left out.
+    """
+    business_ids = list(business_ids)
+    if not business_ids:
+        return {variant: [] for variant in CARD_TEMPLATES}
+
+    versions = get_tag_versions([CATEGORIES_TAG] + [business_tag(business_id) for business_id in business_ids])
+    keys = {
+        (variant, business_id): (
+            f'card:{variant}:{business_id}:'
+            f'{versions[business_tag(business_id)]}.{versions[CATEGORIES_TAG]}'
+        )
+        for variant in CARD_TEMPLATES for business_id in business_ids
+    }
+    found = cache.get_many(list(keys.values()))
+
+    missing = [
+        business_id for business_id in business_ids
+        if any(keys[variant, business_id] not in found for variant in CARD_TEMPLATES)
+    ]
+    if missing:
+        fresh = {}
+        for business in load_businesses(missing):
+            for variant, template_name in CARD_TEMPLATES.items():
+                fresh[keys[variant, business.pk]] = render_to_string(template_name, {'business': business})
+        cache.set_many(fresh, CARD_CACHE_TTL)
+        found.update(fresh)
+
+    return {
+        variant: [
+            mark_safe(found[keys[variant, business_id]])
+            for business_id in business_ids if keys[variant, business_id] in found
+        ]
+        for variant in CARD_TEMPLATES
+    }
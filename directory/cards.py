@@ -0,0 +1,84 @@
+"""
+Listing card serialization from column projections.
+
+Cards are built from one values_list() over Business (with the category and
+owner columns joined in, the description truncated in SQL and the service
+count as a subquery) plus one query for the first few service names of every
+card. No model instances are created.
+"""
+import json
+from django.db.models import Count, F, IntegerField, OuterRef, Subquery, Value, Window
+from django.db.models.functions import Coalesce, RowNumber, Substr
+from django.http import HttpResponse
+from .models import Business, Service, fallback_image_url
+
+CARD_DESCRIPTION_LENGTH = 200
+CARD_SERVICE_NAMES = 5
+
+CARD_COLUMNS = (
+    'id', 'name', 'card_description', 'category__name', 'city', 'pincode',
+    'primary_thumbnail_url', 'avg_rating', 'approved_review_count', 'gst_verified',
+    'kyc_status', 'owner__first_name', 'owner__last_name', 'owner__username',
+    'card_services_count',
+)
+
+
+def _service_names(business_ids):
+    """{business_id: [first service names]} using a per-business row number"""
+    rows = Service.objects.filter(business_id__in=business_ids).annotate(
+        position=Window(RowNumber(), partition_by=F('business_id'), order_by=F('id').asc())
+    ).filter(position__lte=CARD_SERVICE_NAMES).values_list('business_id', 'name')
+
+    names = {}
+    for business_id, name in rows:
+        names.setdefault(business_id, []).append(name)
+    return names
+
+def card_rows(business_ids, distances=None):
+    """Card dicts for the given businesses, in the order of business_ids"""
+    business_ids = list(business_ids)
+    if not business_ids:
+        return []
+
+    services_count = Service.objects.filter(
+        business=OuterRef('pk')
+    ).order_by().values('business').annotate(total=Count('id')).values('total')
+
+    rows = Business.objects.filter(pk__in=business_ids, is_active=True).annotate(
+        card_description=Substr('description', 1, CARD_DESCRIPTION_LENGTH),
+        card_services_count=Coalesce(Subquery(services_count), Value(0), output_field=IntegerField()),
+    ).values_list(*CARD_COLUMNS)
+    service_names = _service_names(business_ids)
+
+    cards = {}
+    for (business_id, name, description, category, city, pincode, image, avg_rating,
+         review_count, gst_verified, kyc_status, first_name, last_name, username,
+         services_count) in rows:
+        card = {
+            'id': business_id,
+            'name': name,
+            'description': description,
+            'category': category,
+            'city': city,
+            'pincode': pincode,
+            'image_url': image or fallback_image_url(business_id),
+            'avg_rating': avg_rating,
+            'approved_reviews_count': review_count,
+            'gst_verified': gst_verified,
+            'kyc_status': kyc_status,
+            'owner_name': f'{first_name} {last_name}'.strip() or username,
+            'services': service_names.get(business_id, []),
+            'services_count': services_count,
+        }
+        if distances is not None and business_id in distances:
+            card['distance_km'] = round(distances[business_id], 2)
+        cards[business_id] = card
+
+    return [cards[business_id] for business_id in business_ids if business_id in cards]
+
+def encode_json(payload):
+    """Compact JSON for payloads of plain str/int/float/bool/list/dict values"""
+    return json.dumps(payload, separators=(',', ':'), ensure_ascii=False, check_circular=False)
+
+def cards_response(payload):
+    return HttpResponse(encode_json(payload), content_type='application/json')
@@ -0,0 +1,32 @@
+from django.db.models import Count, Q
+from .cache_utils import CATEGORIES_TAG, cached, invalidate_tags
+from .models import Category
+
+CATALOGUE_CACHE_TTL = 60 * 60 * 6  # Tagged, so the TTL only bounds memory
+
+
+def categories_with_counts():
+    """Categories by name, each annotated with its active business_count"""
+    return Category.objects.annotate(
+        business_count=Count('business', filter=Q(business__is_active=True))
+    ).order_by('name')
+
+def get_category_catalogue():
+    """({first letter: [categories]}, total active businesses) from one grouped query, cached"""
+    def build():
+        categorized = {}
+        total_businesses = 0
+        for category in categories_with_counts():
+            categorized.setdefault(category.name[0].upper(), []).append(category)
+            total_businesses += category.business_count
+        return categorized, total_businesses
+
+    return cached('category_catalogue', CATALOGUE_CACHE_TTL, build, local=True, tags=[CATEGORIES_TAG])
+
+def catalogue_categories():
+    """Every category with its business_count, by name"""
+    categorized, _ = get_category_catalogue()
+    return [category for categories in categorized.values() for category in categories]
+
+def invalidate_category_catalogue():
+    invalidate_tags(CATEGORIES_TAG)
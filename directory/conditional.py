@@ -0,0 +1,79 @@
+"""
+Conditional GET validators computed without rendering.
+
+Each ETag is a digest of the cache tag and index version stamps a response
+is built from plus the request's normalized parameters, so a matching
+If-None-Match is answered with 304 by django.views.decorators.http.condition
+before the view runs any heavy query. The stamps are the ones the caches
+behind each view are keyed on, so a response never outlives its ETag.
+"""
+import hashlib
+from django.core.paginator import Paginator
+from .autocomplete import autocomplete_index, normalize
+from .cache_utils import CATEGORIES_TAG, LISTINGS_TAG, business_tag, get_tag_versions
+from .listing_query import ListingQuery
+from .page_cache import is_cacheable, page_version
+from .pincodes import pincode_index
+
+SUGGESTIONS_MAX_AGE = 60  # seconds browsers and CDNs may reuse suggestion JSON
+LISTINGS_MAX_AGE = 60     # seconds a CDN may reuse a listings feed page
+AJAX_PAGE_SIZE = 10
+
+
+def _etag(*parts):
+    return hashlib.md5(repr(parts).encode()).hexdigest()
+
+def _tag_version(tag):
+    return get_tag_versions([tag])[tag]
+
+def business_detail_etag(request, pk):
+    # Only the shared anonymous page has a version; everyone else gets a live render
+    if not is_cacheable(request):
+        return None
+    return _etag('business_detail', pk, page_version(pk))
+
+def listings_ajax_page(request):
+    """
+    (listing, page or None, rows, has_next) for the infinite-scroll feed:
+    page-number mode when only ?page is given, else keyset mode after the
+    ?after cursor. Computed once per request, for the ETag and the view.
+    """
+    if not hasattr(request, '_listings_ajax_page'):
+        listing = ListingQuery.from_params(request.GET)
+        cursor = request.GET.get('after')
+        if request.GET.get('page') and not cursor:
+            page_obj = Paginator(listing.results(), AJAX_PAGE_SIZE).get_page(request.GET['page'])
+            rows, has_next = page_obj.object_list, page_obj.has_next()
+        else:
+            page_obj = None
+            rows, has_next = listing.after(cursor, AJAX_PAGE_SIZE)
+        request._listings_ajax_page = (listing, page_obj, rows, has_next)
+    return request._listings_ajax_page
+
+def listings_ajax_etag(request):
+    # The page's rows come from the cached results; the cards are read fresh,
+    # so each card's business tag is part of the version
+    listing, page_obj, rows, has_next = listings_ajax_page(request)
+    tags = [LISTINGS_TAG, CATEGORIES_TAG] + [business_tag(row[-1]) for row in rows]
+    versions = get_tag_versions(tags)
+    return _etag(
+        'listings_ajax', listing.cache_key, request.GET.get('after'),
+        page_obj.number if page_obj else None, [versions[tag] for tag in tags],
+    )
+
+def search_suggestions_etag(request):
+    if request.GET.get('type', 'search') == 'categories':
+        return _etag('search_suggestions', 'categories', _tag_version(CATEGORIES_TAG))
+    return _etag(
+        'search_suggestions', normalize(request.GET.get('term', '')), autocomplete_index.current_version()
+    )
+
+def category_suggestions_etag(request):
+    return _etag('category_suggestions', _tag_version(CATEGORIES_TAG))
+
+def location_suggestions_etag(request):
+    term = ' '.join(request.GET.get('term', '').lower().split())
+    return _etag('location_suggestions', term, _tag_version(LISTINGS_TAG))
+
+def pincode_suggestions_etag(request):
+    return _etag('pincode_suggestions', request.GET.get('term', '').strip(), pincode_index.current_version())
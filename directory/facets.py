@@ -0,0 +1,80 @@
+import hashlib
+from django.db.models import BooleanField, Case, Count, IntegerField, Value, When
+from .cache_utils import cached, invalidate_tags
+from .models import Business
+
+FACETS_TAG = 'listing_facets'
+FACETS_CACHE_TTL = 60 * 30  # Versioned, so the TTL only bounds memory
+
+def _rating_bucket():
+    """Star bucket (1-5) for a stored avg_rating, 0 for unrated businesses"""
+    return Case(
+        *[
+            When(avg_rating__gte=star - 0.5, avg_rating__lt=star + 0.5, then=Value(star))
+            for star in range(1, 6)
+        ],
+        default=Value(0),
+        output_field=IntegerField()
+    )
+
+def compute_listing_facets(businesses):
+    """Count rating, category and verification facets in one grouped query"""
+    rows = Business.objects.filter(
+        pk__in=businesses.values('pk')
+    ).order_by().annotate(
+        rating_bucket=_rating_bucket(),
+        kyc_completed=Case(
+            When(kyc_status='completed', then=Value(True)),
+            default=Value(False),
+            output_field=BooleanField()
+        )
+    ).values(
+        'rating_bucket', 'category_id', 'gst_verified', 'kyc_completed'
+    ).annotate(total=Count('id'))
+
+    facets = {
+        'rating': {star: 0 for star in range(1, 6)},
+        'category': {},
+        'verification': {'gst': 0, 'kyc': 0, 'both': 0, 'any': 0},
+    }
+    for row in rows:
+        total = row['total']
+        if row['rating_bucket']:
+            facets['rating'][row['rating_bucket']] += total
+        facets['category'][row['category_id']] = facets['category'].get(row['category_id'], 0) + total
+
+        gst, kyc = row['gst_verified'], row['kyc_completed']
+        if gst:
+            facets['verification']['gst'] += total
+        if kyc:
+            facets['verification']['kyc'] += total
+        if gst and kyc:
+            facets['verification']['both'] += total
+        if gst or kyc:
+            facets['verification']['any'] += total
+
+    return facets
+
+def get_listing_facets(businesses=None, filter_params=None):
+    """
+    Get facet counts for the listings sidebar.
+    
+    Without filter_params this is the catalogue-wide rollup for all active
+    businesses; otherwise the counts are for `businesses` and cached per
+    normalized filter set, so pagination clicks reuse the same entry.
+    """
+    filter_key = ''
+    if filter_params:
+        filter_key = '&'.join(f'{key}={value}' for key, value in sorted(filter_params.items()))
+    digest = hashlib.md5(filter_key.encode('utf-8')).hexdigest()
+
+    if businesses is None or not filter_params:
+        businesses = Business.objects.filter(is_active=True)
+    return cached(
+        f'listing_facets:{digest}', FACETS_CACHE_TTL, lambda: compute_listing_facets(businesses),
+        local=True, tags=[FACETS_TAG],
+    )
+
+def invalidate_listing_facets():
+    """Drop all cached facet counts after a rating or business status change"""
+    invalidate_tags(FACETS_TAG)
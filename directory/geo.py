@@ -0,0 +1,133 @@
+import math
+from django.db.models import F, FloatField, Q, ExpressionWrapper
+from django.db.models.functions import ASin, Cos, Power, Radians, Sin, Sqrt
+
+EARTH_RADIUS_KM = 6371
+KM_PER_DEGREE_LAT = 111.32
+GEOHASH_PRECISION = 9  # ~5m cells, stored on Business
+MAX_COVER_CELLS = 24   # Upper bound on geohash prefixes per radius query
+MAX_RADIUS_KM = 500    # Radius searches are clamped to this
+
+_BASE32 = '0123456789bcdefghjkmnpqrstuvwxyz'
+
+
+def encode_geohash(latitude, longitude, precision=GEOHASH_PRECISION):
+    """Encode a coordinate pair as a geohash string"""
+    lat_range = [-90.0, 90.0]
+    lng_range = [-180.0, 180.0]
+    latitude, longitude = float(latitude), float(longitude)
+    chars = []
+    bits = 0
+    bit_count = 0
+    even = True
+
+    while len(chars) < precision:
+        value, interval = (longitude, lng_range) if even else (latitude, lat_range)
+        mid = (interval[0] + interval[1]) / 2
+        bits <<= 1
+        if value >= mid:
+            bits |= 1
+            interval[0] = mid
+        else:
+            interval[1] = mid
+        even = not even
+        bit_count += 1
+        if bit_count == 5:
+            chars.append(_BASE32[bits])
+            bits = 0
+            bit_count = 0
+
+    return ''.join(chars)
+
+def clean_coordinates(latitude, longitude):
+    """(latitude, longitude) as floats clamped to valid ranges; ValueError unless both are finite numbers"""
+    latitude, longitude = float(latitude), float(longitude)
+    if not (math.isfinite(latitude) and math.isfinite(longitude)):
+        raise ValueError('coordinates must be finite')
+    return min(max(latitude, -90.0), 90.0), min(max(longitude, -180.0), 180.0)
+
+def clean_radius(radius_km):
+    """Radius in km as a float clamped to [0, MAX_RADIUS_KM]; ValueError unless it is a finite number"""
+    radius_km = float(radius_km)
+    if not math.isfinite(radius_km):
+        raise ValueError('radius must be finite')
+    return min(max(radius_km, 0.0), MAX_RADIUS_KM)
+
+def business_geohash(business):
+    """Geohash for a business, or '' if it has no coordinates"""
+    if business.latitude is None or business.longitude is None:
+        return ''
+    return encode_geohash(business.latitude, business.longitude)
+
+def bounding_box(latitude, longitude, radius_km):
+    """(min_lat, max_lat, min_lng, max_lng) enclosing a radius around a point"""
+    lat_delta = radius_km / KM_PER_DEGREE_LAT
+    lng_delta = radius_km / (KM_PER_DEGREE_LAT * max(math.cos(math.radians(latitude)), 0.01))
+    return (
+        max(latitude - lat_delta, -90.0),
+        min(latitude + lat_delta, 90.0),
+        max(longitude - lng_delta, -180.0),
+        min(longitude + lng_delta, 180.0),
+    )
+
+def _cell_size(precision):
+    """Height and width in degrees of a geohash cell"""
+    lat_bits = (5 * precision) // 2
+    lng_bits = 5 * precision - lat_bits
+    return 180.0 / (2 ** lat_bits), 360.0 / (2 ** lng_bits)
+
+def covering_cells(min_lat, max_lat, min_lng, max_lng):
+    """
+    Geohash prefixes covering a bounding box, at the finest precision that
+    needs no more than MAX_COVER_CELLS cells. Returns [] when the box is too
+    large for any useful prefix.
+    """
+    for precision in range(GEOHASH_PRECISION, 0, -1):
+        cell_height, cell_width = _cell_size(precision)
+        rows = math.ceil((max_lat - min_lat) / cell_height) + 1
+        cols = math.ceil((max_lng - min_lng) / cell_width) + 1
+        if rows * cols > MAX_COVER_CELLS:
+            continue
+
+        lats = [min(min_lat + row * cell_height, max_lat) for row in range(rows)] + [max_lat]
+        lngs = [min(min_lng + col * cell_width, max_lng) for col in range(cols)] + [max_lng]
+        return sorted({encode_geohash(lat, lng, precision) for lat in lats for lng in lngs})
+
+    return []
+
+def distance_expression(latitude, longitude):
+    """Haversine great-circle distance in km from a point to each row"""
+    haversine = (
+        Power(Sin(Radians(F('latitude') - latitude) / 2), 2) +
+        Cos(Radians(latitude)) * Cos(Radians(F('latitude'))) *
+        Power(Sin(Radians(F('longitude') - longitude) / 2), 2)
+    )
+    return ExpressionWrapper(
+        2 * EARTH_RADIUS_KM * ASin(Sqrt(haversine)),
+        output_field=FloatField()
+    )
+
+def nearby_businesses(queryset, latitude, longitude, radius_km):
+    """
+    Businesses within radius_km of a point, nearest first.
+
+    Candidates are narrowed by indexed geohash prefixes and a lat/lng bounding
+    box before the exact distance is computed.
+    """
+    min_lat, max_lat, min_lng, max_lng = bounding_box(latitude, longitude, radius_km)
+
+    cell_filter = Q()
+    for cell in covering_cells(min_lat, max_lat, min_lng, max_lng):
+        cell_filter |= Q(geohash__startswith=cell)
+
+    queryset = queryset.filter(
+        cell_filter,
+        latitude__range=(min_lat, max_lat),
+        longitude__range=(min_lng, max_lng),
+    ).annotate(
+        distance_km=distance_expression(latitude, longitude)
+    ).filter(
+        distance_km__lte=radius_km
+    )
+
+    return queryset.order_by('distance_km', 'id')
@@ -0,0 +1,60 @@
+"""
+Precomputed data set of the home page.
+
+Everything the home page shows (the category list and top categories with
+their counts, featured business cards, totals) is built into one JSON blob
+by a Celery beat task, so a request is a single cache read and a
+json.loads. A request only builds the payload itself when the blob is
+missing, e.g. on a cold cache before the first beat run, and then through
+cached() so one worker builds it while the others wait for the result.
+"""
+import json
+from django.utils import timezone
+from .cache_utils import cached, refresh_cached
+from .cards import card_rows, encode_json
+from .catalogue import catalogue_categories
+from .models import Business
+
+HOMEPAGE_KEY = 'homepage_payload'
+HOMEPAGE_REFRESH_INTERVAL = 60  # seconds between beat rebuilds
+HOMEPAGE_TTL = 10 * 60          # outlives a few missed beats
+TOP_CATEGORIES = 12
+FEATURED_BUSINESSES = 8
+
+
+def build_homepage_payload():
+    """The home page data set as plain JSON-serializable values"""
+    categories = catalogue_categories()
+    top_categories = sorted(categories, key=lambda category: -category.business_count)[:TOP_CATEGORIES]
+    featured_ids = Business.objects.filter(is_active=True).order_by(
+        '-avg_rating', '-approved_review_count', 'id'
+    ).values_list('id', flat=True)[:FEATURED_BUSINESSES]
+
+    return {
+        'categories': [{'id': category.id, 'name': category.name} for category in categories],
+        'top_categories': [
+            {
+                'id': category.id,
+                'name': category.name,
+                'image_url': category.get_image_url(),
+                'business_count': category.business_count,
+            }
+            for category in top_categories
+        ],
+        # Cards carry the stored rating aggregates and primary image URL
+        'featured_businesses': card_rows(list(featured_ids)),
+        'total_businesses': sum(category.business_count for category in categories),
+        'total_categories': len(categories),
+        'built_at': timezone.now().isoformat(),
+    }
+
+def _homepage_blob():
+    return encode_json(build_homepage_payload())
+
+def refresh_homepage_payload():
+    """Rebuild and store the blob; returns the payload"""
+    return json.loads(refresh_cached(HOMEPAGE_KEY, HOMEPAGE_TTL, _homepage_blob))
+
+def get_homepage_payload():
+    """The stored payload, built by a single worker when the cache is cold"""
+    return json.loads(cached(HOMEPAGE_KEY, HOMEPAGE_TTL, _homepage_blob))
@@ -0,0 +1,69 @@
+"""
+Weekly opening hours as a bitmap on Business.
+
+The week is 7 x 96 quarter-hour slots starting Monday 00:00, stored as a
+168-character hex string with four slots per digit, most significant bit
+first. It is rebuilt from BusinessHours whenever they change, so "open at"
+is a substring comparison in SQL; pages show the BusinessHours rows
+themselves. An empty string means no hours have been entered.
+"""
+from django.db.models.functions import Substr
+from django.db.models.lookups import In
+from django.utils import timezone
+from .models import Business, BusinessHours
+
+SLOT_MINUTES = 15
+SLOTS_PER_DAY = 24 * 60 // SLOT_MINUTES
+WEEK_SLOTS = 7 * SLOTS_PER_DAY
+HEX_DIGITS = '0123456789abcdef'
+
+
+def _minutes(value):
+    return value.hour * 60 + value.minute
+
+def encode_week(rows):
+    """Hex schedule for (day, open_time, close_time, is_closed) rows, '' if there are none"""
+    rows = list(rows)
+    if not rows:
+        return ''
+
+    bits = bytearray(WEEK_SLOTS)
+    for day, open_time, close_time, is_closed in rows:
+        if is_closed:
+            continue
+        opens = (day - 1) * 24 * 60 + _minutes(open_time)
+        span = _minutes(close_time) - _minutes(open_time)
+        if span <= 0:
+            # Closes after midnight, or is open round the clock
+            span += 24 * 60
+        # Every slot the business is open in for any part of; Sunday night
+        # wraps round to Monday morning
+        for slot in range(opens // SLOT_MINUTES, -(-(opens + span) // SLOT_MINUTES)):
+            bits[slot % WEEK_SLOTS] = 1
+
+    return ''.join(
+        HEX_DIGITS[bits[i] << 3 | bits[i + 1] << 2 | bits[i + 2] << 1 | bits[i + 3]]
+        for i in range(0, WEEK_SLOTS, 4)
+    )
+
+def week_slot(day, hour, minute):
+    """Slot index of a weekday 1-7 and time of day"""
+    return (day - 1) * SLOTS_PER_DAY + (hour * 60 + minute) // SLOT_MINUTES
+
+def current_slot():
+    now = timezone.localtime()
+    return week_slot(now.isoweekday(), now.hour, now.minute)
+
+def open_at_filter(slot):
+    """Condition for Business.filter() matching businesses open in a week slot"""
+    position, bit = divmod(slot, 4)
+    digits = [digit for value, digit in enumerate(HEX_DIGITS) if value & 8 >> bit]
+    return In(Substr('weekly_hours', position + 1, 1), digits)
+
+def refresh_weekly_hours(business_id):
+    """Re-encode one business's schedule from its BusinessHours rows"""
+    rows = BusinessHours.objects.filter(business_id=business_id).values_list(
+        'day', 'open_time', 'close_time', 'is_closed'
+    )
+    # update() keeps this out of the Business save signals
+    Business.objects.filter(pk=business_id).update(weekly_hours=encode_week(rows))
@@ -0,0 +1,33 @@
+import logging
+from .models import Business, BusinessImage
+
+logger = logging.getLogger(__name__)
+
+# Cloudinary delivery transformation for card-sized images
+THUMBNAIL_TRANSFORMATION = 'c_fill,w_480,h_320,q_auto,f_auto'
+
+
+def thumbnail_url(url):
+    """Card-sized variant of a Cloudinary image URL; other URLs are returned unchanged"""
+    if '/image/upload/' not in url:
+        return url
+    return url.replace('/image/upload/', f'/image/upload/{THUMBNAIL_TRANSFORMATION}/', 1)
+
+def image_urls(business_image):
+    """(url, thumbnail_url) for a BusinessImage, ('', '') if the storage can't build one"""
+    try:
+        url = business_image.image.url
+    except (ValueError, AttributeError, IOError) as e:
+        logger.error(f"Error retrieving image URL for business {business_image.business_id}: {str(e)}")
+        return '', ''
+    return url, thumbnail_url(url)
+
+def refresh_primary_image(business_id):
+    """Copy the current primary image URLs onto the business row"""
+    primary_image = BusinessImage.objects.filter(business_id=business_id, is_primary=True).first()
+    url, thumbnail = image_urls(primary_image) if primary_image else ('', '')
+    # update() keeps this out of the Business save signals
+    Business.objects.filter(pk=business_id).update(
+        primary_image_url=url,
+        primary_thumbnail_url=thumbnail
+    )
@@ -0,0 +1,292 @@
+"""
+One parser and query builder for the listings page and its AJAX feed.
+
+Request parameters become a canonical, hashable ListingQuery. The ordered
+sort keys of its matches are cached per spec under the listings tag, which
+Business, Service and Review changes bump, so a page render only hydrates
+the dozen rows it shows by primary key.
+"""
+import hashlib
+import json
+from dataclasses import dataclass, asdict, replace
+from django.conf import settings
+from django.db.models import Q
+from .cache_utils import LISTINGS_TAG, cached, invalidate_tags
+from .cards import card_rows
+from .geo import nearby_businesses, clean_coordinates, clean_radius
+from .hours import current_slot, week_slot, open_at_filter
+from .models import Business
+from .nearby import nearby_engine, filter_hits
+from .pagination import decode_cursor, after_filter
+from .pincodes import filter_by_pincode
+from .search import search_businesses
+
+RESULTS_CACHE_TTL = 60
+MAX_CACHED_ROWS = 2000  # rows past this prefix are read from the database
+GEO_PRECISION = 4       # decimal places kept from lat/lng (~11m)
+VERIFICATION_CHOICES = ('gst', 'kyc', 'both', 'any')
+
+
+def _squash(value):
+    return ' '.join((value or '').split())
+
+def invalidate_listing_results():
+    """Drop every cached listing result list"""
+    invalidate_tags(LISTINGS_TAG)
+
+
+class ListingResults:
+    """
+    Sequence of sort-key rows for Paginator. Rows inside the cached prefix
+    are served from memory, anything past it comes from the database.
+    """
+    def __init__(self, listing, rows, total):
+        self.listing = listing
+        self.rows = rows
+        self.total = total
+        self._positions = None
+
+    def __len__(self):
+        return self.total
+
+    def __getitem__(self, index):
+        if isinstance(index, slice) and (index.stop or 0) > len(self.rows) and len(self.rows) < self.total:
+            return self.listing.uncached_rows(index)
+        return self.rows[index]
+
+    def position_of(self, business_id):
+        """Index of a business in the cached prefix, or None"""
+        if self._positions is None:
+            self._positions = {row[-1]: position for position, row in enumerate(self.rows)}
+        return self._positions.get(business_id)
+
+
+@dataclass(frozen=True)
+class ListingQuery:
+    categories: tuple = ()
+    query: str = ''
+    location: str = ''
+    geo: tuple = None  # (latitude, longitude, radius_km)
+    pincode: str = ''
+    verification: str = ''
+    rating: int = None
+    open_slot: int = None  # quarter-hour of the week, see directory.hours
+
+    @classmethod
+    def from_params(cls, params):
+        """Canonical spec from request GET parameters; invalid values are dropped"""
+        categories = set()
+        for value in (params.get('category') or '').split(','):
+            try:
+                categories.add(int(value))
+            except ValueError:
+                pass
+
+        geo = None
+        if params.get('lat') and params.get('lng'):
+            try:
+                latitude, longitude = clean_coordinates(params['lat'], params['lng'])
+                geo = (
+                    round(latitude, GEO_PRECISION),
+                    round(longitude, GEO_PRECISION),
+                    clean_radius(params.get('radius') or 50),
+                )
+            except (TypeError, ValueError):
+                geo = None
+
+        try:
+            rating = int(params.get('rating') or 0) or None
+        except ValueError:
+            rating = None
+
+        open_slot = None
+        if params.get('open') == 'now':
+            open_slot = current_slot()
+        elif params.get('open_day') and params.get('open_time'):
+            try:
+                day = int(params['open_day'])
+                hour, minute = (int(part) for part in params['open_time'].split(':'))
+            except ValueError:
+                day = None
+            if day in range(1, 8) and hour in range(24) and minute in range(60):
+                open_slot = week_slot(day, hour, minute)
+
+        verification = params.get('verification') or ''
+        return cls(
+            categories=tuple(sorted(categories)),
+            query=_squash(params.get('query')),
+            # Text location is only a fallback when there are no coordinates
+            location='' if geo else _squash(params.get('location')),
+            geo=geo,
+            pincode=(params.get('pincode') or '').strip(),
+            verification=verification if verification in VERIFICATION_CHOICES else '',
+            rating=rating if rating in range(1, 6) else None,
+            open_slot=open_slot,
+        )
+
+    def as_params(self):
+        """The non-empty filters, for cache keys"""
+        return {key: value for key, value in asdict(self).items() if value or value == 0}
+
+    @property
+    def cache_key(self):
+        return hashlib.md5(json.dumps(asdict(self), sort_keys=True).encode()).hexdigest()
+
+    @property
+    def ordering(self):
+        """Sort keys for the results; the trailing id makes them a valid keyset"""
+        if self.geo:
+            return ('distance_km', 'id')
+        if self.query:
+            return ('-search_rank', '-created_at', '-id')
+        return ('-created_at', '-id')
+
+    @property
+    def uses_engine(self):
+        return bool(self.geo) and settings.NEARBY_ENGINE_ENABLED
+
+    def without_rating(self):
+        return replace(self, rating=None)
+
+    # ------------------------------------------------------------------
+    # Query building
+    # ------------------------------------------------------------------
+    def _location_filter(self):
+        # Any word of the location text may match any address field
+        location_filter = Q()
+        for word in self.location.split():
+            if len(word) >= 2:
+                location_filter |= (
+                    Q(city__icontains=word) |
+                    Q(address__icontains=word) |
+                    Q(formatted_address__icontains=word) |
+                    Q(pincode__icontains=word) |
+                    Q(state__icontains=word)
+                )
+        return location_filter
+
+    def _engine_hits(self, after=None):
+        latitude, longitude, radius_km = self.geo
+        return nearby_engine.within_radius(latitude, longitude, radius_km, after=after)
+
+    def queryset(self):
+        """Unordered queryset of the matching active businesses"""
+        businesses = Business.objects.filter(is_active=True)
+
+        if self.categories:
+            businesses = businesses.filter(category_id__in=self.categories)
+
+        if self.geo:
+            if self.uses_engine:
+                # Distances come from the in-process engine; the ORM only
+                # applies the remaining filters to the ids it returns
+                businesses = businesses.filter(pk__in=[business_id for business_id, _ in self._engine_hits()])
+            else:
+                businesses = nearby_businesses(businesses, *self.geo)
+        elif self.location:
+            businesses = businesses.filter(self._location_filter())
+
+        if self.pincode:
+            businesses = filter_by_pincode(businesses, self.pincode)
+
+        if self.verification == 'gst':
+            businesses = businesses.filter(gst_verified=True)
+        elif self.verification == 'kyc':
+            businesses = businesses.filter(kyc_status='completed')
+        elif self.verification == 'both':
+            businesses = businesses.filter(gst_verified=True, kyc_status='completed')
+        elif self.verification == 'any':
+            businesses = businesses.filter(Q(gst_verified=True) | Q(kyc_status='completed'))
+
+        if self.query:
+            businesses = search_businesses(businesses, self.query)
+
+        if self.open_slot is not None:
+            businesses = businesses.filter(open_at_filter(self.open_slot))
+
+        # Exact star bucket, matching the rating facet counts
+        if self.rating:
+            businesses = businesses.filter(
+                avg_rating__gte=self.rating - 0.5,
+                avg_rating__lt=self.rating + 0.5
+            )
+
+        return businesses.order_by()
+
+    def row_queryset(self):
+        """Ordered sort-key tuples of the matches, straight from the database"""
+        return self.queryset().order_by(*self.ordering).values_list(
+            *(field.lstrip('-') for field in self.ordering)
+        )
+
+    def _engine_rows(self, after=None):
+        hits = filter_hits(self.queryset(), self._engine_hits(after))
+        return [(distance, business_id) for business_id, distance in hits]
+
+    def uncached_rows(self, index):
+        """A slice of the sort-key rows computed from scratch"""
+        if self.uses_engine:
+            return self._engine_rows()[index]
+        return list(self.row_queryset()[index])
+
+    # ------------------------------------------------------------------
+    # Cached results
+    # ------------------------------------------------------------------
+    def _build_rows(self):
+        if self.uses_engine:
+            rows = self._engine_rows()
+            return rows, len(rows)
+
+        rows = list(self.row_queryset()[:MAX_CACHED_ROWS + 1])
+        if len(rows) <= MAX_CACHED_ROWS:
+            return rows, len(rows)
+        return rows[:MAX_CACHED_ROWS], self.queryset().count()
+
+    def results(self):
+        """ListingResults for this spec, cached briefly per filter combination"""
+        rows, total = cached(
+            f'listing_rows:{self.cache_key}', RESULTS_CACHE_TTL, self._build_rows,
+            local=True, tags=[LISTINGS_TAG],
+        )
+        return ListingResults(self, rows, total)
+
+    def after(self, cursor, size):
+        """(rows, has_next) for the `size` rows following a cursor"""
+        results = self.results()
+        values = decode_cursor(cursor, self.ordering)
+        start = 0
+
+        if values is not None:
+            position = results.position_of(values[-1])
+            if position is None:
+                # The cursor row is past the cached prefix or no longer matches
+                if self.uses_engine:
+                    rows = self._engine_rows(after=tuple(values))[:size + 1]
+                else:
+                    rows = list(self.row_queryset().filter(after_filter(self.ordering, values))[:size + 1])
+                return rows[:size], len(rows) > size
+            start = position + 1
+
+        rows = results[start:start + size + 1]
+        return rows[:size], len(rows) > size
+
+    def hydrate(self, rows):
+        """Business objects for sort-key rows, in row order"""
+        businesses = Business.objects.filter(is_active=True).select_related(
+            'category', 'owner'
+        ).prefetch_related('services').in_bulk([row[-1] for row in rows])
+
+        hydrated = []
+        for row in rows:
+            business = businesses.get(row[-1])
+            if business is None:
+                continue
+            if self.geo:
+                business.distance_km = row[0]
+            hydrated.append(business)
+        return hydrated
+
+    def cards(self, rows):
+        """Listing card dicts for sort-key rows, in row order"""
+        distances = {row[-1]: row[0] for row in rows} if self.geo else None
+        return card_rows([row[-1] for row in rows], distances)
@@ -0,0 +1,129 @@
+from collections import Counter
+from django.db import transaction
+from django.db.models import F
+from .cache_utils import LISTINGS_TAG, cached, invalidate_tags
+from .models import Business, Locality
+
+MAX_AREAS_PER_BUSINESS = 4
+SUGGESTIONS_CACHE_TTL = 600
+IGNORED_AREAS = {'india'}
+
+
+def _clean(value):
+    """Collapse whitespace and trim to the gazetteer column length"""
+    return ' '.join((value or '').split())[:100]
+
+def business_localities(city, state, address, pincode):
+    """Gazetteer keys (kind, name, city, state, pincode) a business counts towards"""
+    city = _clean(city)
+    state = _clean(state)
+    keys = set()
+    if city:
+        keys.add(('city', city, city, state, ''))
+    if state:
+        keys.add(('state', state, '', state, ''))
+
+    # Area names are the comma separated address parts that aren't the
+    # city, state, a house number or a pincode
+    seen = {city.lower(), state.lower()} | IGNORED_AREAS
+    areas = 0
+    for part in (address or '').split(','):
+        area = _clean(part)
+        if len(area) < 3 or area.lower() in seen or any(char.isdigit() for char in area):
+            continue
+        seen.add(area.lower())
+        keys.add(('area', area, city, state, (pincode or '').strip()))
+        areas += 1
+        if areas >= MAX_AREAS_PER_BUSINESS:
+            break
+    return keys
+
+def localities_for(business):
+    """Gazetteer keys for a Business, empty unless it is active"""
+    if not business.is_active:
+        return set()
+    return business_localities(business.city, business.state, business.address, business.pincode)
+
+def _lookup(key):
+    kind, name, city, state, pincode = key
+    return {'kind': kind, 'search_name': name.lower(), 'city': city, 'state': state, 'pincode': pincode}
+
+def apply_locality_delta(keys, delta):
+    """Shift the business count of each gazetteer entry, creating or dropping rows"""
+    with transaction.atomic():
+        for key in keys:
+            lookup = _lookup(key)
+            if delta > 0:
+                locality, created = Locality.objects.get_or_create(
+                    **lookup, defaults={'name': key[1], 'business_count': delta}
+                )
+                if not created:
+                    Locality.objects.filter(pk=locality.pk).update(business_count=F('business_count') + delta)
+            else:
+                # Drop rows this empties before shifting the rest
+                Locality.objects.filter(**lookup, business_count__lte=-delta).delete()
+                Locality.objects.filter(**lookup).update(business_count=F('business_count') + delta)
+
+def count_localities(rows):
+    """{(kind, search_name, city, state, pincode): (name, count)} for (city, state, address, pincode) rows"""
+    counts = {}
+    for city, state, address, pincode in rows:
+        for key in business_localities(city, state, address, pincode):
+            lookup = tuple(_lookup(key).values())
+            name, count = counts.get(lookup, (key[1], 0))
+            counts[lookup] = (name, count + 1)
+    return counts
+
+def rebuild_localities(chunk_size=2000):
+    """Rebuild the whole gazetteer from active businesses"""
+    rows = Business.objects.filter(is_active=True).values_list(
+        'city', 'state', 'address', 'pincode'
+    ).iterator(chunk_size=chunk_size)
+
+    localities = [
+        Locality(
+            kind=kind, name=name, search_name=search_name,
+            city=city, state=state, pincode=pincode, business_count=count
+        )
+        for (kind, search_name, city, state, pincode), (name, count) in count_localities(rows).items()
+    ]
+    with transaction.atomic():
+        Locality.objects.all().delete()
+        Locality.objects.bulk_create(localities, batch_size=chunk_size)
+    invalidate_tags(LISTINGS_TAG)
+    return len(localities)
+
+def locality_suggestions(term, limit=8, scan=50):
+    """Ranked location suggestion strings for a typed prefix"""
+    prefix = _clean(term).lower()
+    if len(prefix) < 2:
+        return []
+    # Locality counts only move with Business saves, which bump the listings tag
+    return cached(
+        f'locality_suggestions:{limit}:{scan}:{prefix}', SUGGESTIONS_CACHE_TTL,
+        lambda: _locality_suggestions(prefix, limit, scan), tags=[LISTINGS_TAG],
+    )
+
+def _locality_suggestions(prefix, limit, scan):
+    rows = Locality.objects.filter(
+        search_name__startswith=prefix
+    ).order_by('-business_count', 'search_name').values_list(
+        'kind', 'name', 'city', 'state', 'business_count'
+    )[:scan]
+
+    # Areas are stored per pincode; fold them together per city for display
+    totals = {'city': Counter(), 'area': Counter(), 'state': Counter()}
+    for kind, name, city, state, count in rows:
+        if kind == 'area':
+            label = f"{name}, {city}" if city else name
+        elif kind == 'state':
+            label = f"{name} State"
+        else:
+            label = name
+        totals[kind][label] += count
+
+    suggestions = []
+    for kind, quota in (('city', 5), ('area', 3), ('state', 2)):
+        for label, count in totals[kind].most_common(quota):
+            suggestions.append(f"{label} ({count} businesses)")
+    return suggestions[:limit]
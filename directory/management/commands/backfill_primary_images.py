@@ -0,0 +1,52 @@
+from django.core.management.base import BaseCommand
+from directory.cache_utils import business_tag, invalidate_tags
+from directory.images import image_urls
+from directory.models import Business, BusinessImage
+
+class Command(BaseCommand):
+    help = 'Copy primary image and thumbnail URLs from BusinessImage onto existing businesses'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--chunk-size',
+            type=int,
+            default=500,
+            help='Number of businesses to update per batch (default: 500)',
+        )
+
+    def handle(self, *args, **options):
+        chunk_size = max(1, options['chunk_size'])
+        last_id = 0
+        total = 0
+
+        # Walk the table by primary key so each chunk is an indexed range scan
+        while True:
+            business_ids = list(
+                Business.objects.filter(pk__gt=last_id)
+                .order_by('pk')
+                .values_list('pk', flat=True)[:chunk_size]
+            )
+            if not business_ids:
+                break
+
+            # First primary image per business, matching Business.get_primary_image
+            primary_images = {}
+            for image in BusinessImage.objects.filter(
+                business_id__in=business_ids, is_primary=True
+            ).order_by('pk'):
+                primary_images.setdefault(image.business_id, image)
+
+            businesses = []
+            for business_id in business_ids:
+                image = primary_images.get(business_id)
+                url, thumbnail = image_urls(image) if image else ('', '')
+                businesses.append(Business(pk=business_id, primary_image_url=url, primary_thumbnail_url=thumbnail))
+            Business.objects.bulk_update(businesses, ['primary_image_url', 'primary_thumbnail_url'])
+            # bulk_update skips the save signals that bump the business tags
+            invalidate_tags(*(business_tag(business_id) for business_id in business_ids))
+
+            total += len(businesses)
+            last_id = business_ids[-1]
+            self.stdout.write(f"Updated image URLs for {total} businesses (up to id {last_id})")
+
+        self.stdout.write(self.style.SUCCESS(f'Successfully backfilled image URLs for {total} businesses'))
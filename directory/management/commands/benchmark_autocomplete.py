@@ -0,0 +1,57 @@
+import time
+from django.core.management.base import BaseCommand
+from django.db.models import Q
+from directory.autocomplete import autocomplete_index
+from directory.models import Business
+from directory.search import search_businesses
+
+class Command(BaseCommand):
+    help = 'Compare the in-process autocomplete index with the ORM suggestion queries'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--terms',
+            nargs='+',
+            default=['a', 'pl', 'plu', 'acme', 'elec', 'clinic', 'sch', 'repair', 'xyz'],
+            help='Search terms to benchmark',
+        )
+        parser.add_argument(
+            '--iterations',
+            type=int,
+            default=200,
+            help='Lookups per term (default: 200)',
+        )
+
+    def _time(self, func, terms, iterations):
+        start = time.perf_counter()
+        for _ in range(iterations):
+            for term in terms:
+                func(term)
+        elapsed = time.perf_counter() - start
+        return elapsed / (iterations * len(terms)) * 1_000_000
+
+    def handle(self, *args, **options):
+        terms = options['terms']
+        iterations = max(1, options['iterations'])
+        active = Business.objects.filter(is_active=True)
+
+        build_start = time.perf_counter()
+        autocomplete_index.rebuild()
+        build_ms = (time.perf_counter() - build_start) * 1000
+
+        paths = [
+            ('ORM icontains', lambda term: list(active.filter(
+                Q(name__icontains=term) | Q(description__icontains=term)
+            ).values_list('name', flat=True)[:10])),
+            ('ORM full-text', lambda term: list(search_businesses(active, term).order_by(
+                '-search_rank'
+            ).values_list('name', flat=True)[:10])),
+            ('Autocomplete index', lambda term: autocomplete_index.search(term, 10)),
+        ]
+
+        self.stdout.write(f"Index built in {build_ms:.1f} ms ({active.count()} active businesses)")
+        self.stdout.write(f"{len(terms)} terms x {iterations} iterations")
+        for label, func in paths:
+            self.stdout.write(f"  {label:<20} {self._time(func, terms, iterations):>10.1f} µs/lookup")
+
+        self.stdout.write(self.style.SUCCESS('Benchmark complete'))
@@ -0,0 +1,93 @@
+import time
+import tracemalloc
+from django.core.management.base import BaseCommand
+from django.core.serializers.json import DjangoJSONEncoder
+from django.db import connection
+from django.http import JsonResponse
+from django.test.utils import CaptureQueriesContext
+from directory.cards import card_rows, cards_response
+from directory.models import Business
+
+def legacy_card(business):
+    """Card payload as built from full model instances before the projection"""
+    return {
+        'id': business.id,
+        'name': business.name,
+        'description': business.description,
+        'category': business.category.name,
+        'city': business.city,
+        'pincode': business.pincode,
+        'image_url': business.get_primary_image_url(),
+        'avg_rating': business.avg_rating,
+        'approved_reviews_count': business.approved_review_count,
+        'gst_verified': business.gst_verified,
+        'kyc_status': business.kyc_status,
+        'owner_name': business.owner.get_full_name() or business.owner.username,
+        'services': [service.name for service in business.services.all()[:5]],
+        'services_count': business.services.count(),
+    }
+
+class Command(BaseCommand):
+    help = 'Compare model-instance and projection serializers for one page of listing cards'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--page-size',
+            type=int,
+            default=10,
+            help='Cards per page (default: 10)',
+        )
+        parser.add_argument(
+            '--iterations',
+            type=int,
+            default=50,
+            help='Pages serialized per measurement (default: 50)',
+        )
+
+    def _measure(self, func, iterations):
+        with CaptureQueriesContext(connection) as queries:
+            func()
+        query_count = len(queries)
+
+        tracemalloc.start()
+        before = tracemalloc.take_snapshot()
+        func()
+        after = tracemalloc.take_snapshot()
+        _, peak = tracemalloc.get_traced_memory()
+        tracemalloc.stop()
+        stats = after.compare_to(before, 'filename')
+        allocated_blocks = sum(stat.count_diff for stat in stats if stat.count_diff > 0)
+
+        start = time.perf_counter()
+        for _ in range(iterations):
+            func()
+        elapsed_ms = (time.perf_counter() - start) / iterations * 1000
+        return query_count, peak, allocated_blocks, elapsed_ms
+
+    def handle(self, *args, **options):
+        page_size = max(1, options['page_size'])
+        iterations = max(1, options['iterations'])
+        business_ids = list(
+            Business.objects.filter(is_active=True).order_by('-created_at', '-id').values_list('id', flat=True)[:page_size]
+        )
+        if not business_ids:
+            self.stdout.write(self.style.WARNING('No active businesses to benchmark'))
+            return
+
+        def legacy_page():
+            businesses = Business.objects.filter(pk__in=business_ids).select_related(
+                'category', 'owner'
+            ).prefetch_related('services')
+            payload = {'businesses': [legacy_card(business) for business in businesses]}
+            return JsonResponse(payload, encoder=DjangoJSONEncoder).content
+
+        def projection_page():
+            return cards_response({'businesses': card_rows(business_ids)}).content
+
+        self.stdout.write(f"{len(business_ids)} cards per page, {iterations} iterations")
+        self.stdout.write(f"  {'':<22}{'queries':>8}{'peak KiB':>11}{'blocks':>9}{'ms/page':>10}")
+        for label, func in (('Model instances', legacy_page), ('Column projection', projection_page)):
+            query_count, peak, blocks, elapsed_ms = self._measure(func, iterations)
+            self.stdout.write(f"  {label:<22}{query_count:>8}{peak / 1024:>11.1f}{blocks:>9}{elapsed_ms:>10.2f}")
+
+        self.stdout.write(self.style.SUCCESS('Benchmark complete'))
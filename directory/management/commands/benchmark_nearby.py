@@ -0,0 +1,114 @@
+import time
+import numpy as np
+from django.core.management.base import BaseCommand
+from directory.geo import EARTH_RADIUS_KM
+from directory.nearby import NearbyEngine
+
+class Command(BaseCommand):
+    help = 'Benchmark the nearby engine against a brute-force NumPy scan on synthetic businesses'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--sizes',
+            nargs='+',
+            type=int,
+            default=[100_000, 1_000_000],
+            help='Synthetic business counts to benchmark',
+        )
+        parser.add_argument(
+            '--categories',
+            type=int,
+            default=30,
+            help='Number of synthetic categories (default: 30)',
+        )
+        parser.add_argument(
+            '--queries',
+            type=int,
+            default=200,
+            help='Queries per measurement (default: 200)',
+        )
+        parser.add_argument(
+            '--radius',
+            type=float,
+            default=10.0,
+            help='Search radius in km (default: 10)',
+        )
+
+    def _brute_force(self, lat_rad, lng_rad, latitude, longitude):
+        query_lat = np.radians(latitude)
+        a = (
+            np.sin((lat_rad - query_lat) / 2) ** 2 +
+            np.cos(query_lat) * np.cos(lat_rad) * np.sin((lng_rad - np.radians(longitude)) / 2) ** 2
+        )
+        return 2 * EARTH_RADIUS_KM * np.arcsin(np.sqrt(np.minimum(a, 1.0)))
+
+    def _time(self, func, points):
+        start = time.perf_counter()
+        for latitude, longitude in points:
+            func(latitude, longitude)
+        return (time.perf_counter() - start) / len(points) * 1000
+
+    def handle(self, *args, **options):
+        rng = np.random.default_rng(42)
+        radius = options['radius']
+        query_count = max(1, options['queries'])
+
+        for size in options['sizes']:
+            # Businesses clustered around city centres across India
+            centres = np.column_stack([rng.uniform(8, 34, 200), rng.uniform(69, 96, 200)])
+            picks = rng.integers(0, len(centres), size)
+            lats = centres[picks, 0] + rng.normal(0, 0.15, size)
+            lngs = centres[picks, 1] + rng.normal(0, 0.15, size)
+            ids = np.arange(1, size + 1)
+            category_ids = rng.integers(1, options['categories'] + 1, size)
+
+            engine = NearbyEngine(auto_reload=False)
+            build_start = time.perf_counter()
+            engine.load_arrays(ids, lats, lngs, category_ids)
+            build_ms = (time.perf_counter() - build_start) * 1000
+
+            lat_rad, lng_rad = np.radians(lats), np.radians(lngs)
+            points = centres[rng.integers(0, len(centres), query_count)] + rng.normal(0, 0.1, (query_count, 2))
+            single_category = [1]
+
+            def brute_radius(latitude, longitude):
+                distances = self._brute_force(lat_rad, lng_rad, latitude, longitude)
+                hits = np.flatnonzero(distances <= radius)
+                return hits[np.argsort(distances[hits])]
+
+            def brute_radius_category(latitude, longitude):
+                distances = self._brute_force(lat_rad, lng_rad, latitude, longitude)
+                hits = np.flatnonzero((distances <= radius) & (category_ids == 1))
+                return hits[np.argsort(distances[hits])]
+
+            def brute_nearest(latitude, longitude):
+                distances = self._brute_force(lat_rad, lng_rad, latitude, longitude)
+                nearest = np.argpartition(distances, 10)[:10]
+                return nearest[np.argsort(distances[nearest])]
+
+            # Spot-check the engine against the brute-force answer
+            latitude, longitude = points[0]
+            expected = ids[brute_radius(latitude, longitude)].tolist()
+            actual = [business_id for business_id, _ in engine.within_radius(latitude, longitude, radius, limit=None)]
+            if sorted(expected) != sorted(actual):
+                self.stderr.write(self.style.ERROR(f'Result mismatch at {size} businesses'))
+
+            paths = [
+                (f'Radius {radius:g} km', brute_radius,
+                 lambda la, lo: engine.within_radius(la, lo, radius, limit=None)),
+                (f'Radius {radius:g} km, 1 category', brute_radius_category,
+                 lambda la, lo: engine.within_radius(la, lo, radius, single_category, limit=None)),
+                ('10 nearest', brute_nearest,
+                 lambda la, lo: engine.nearest(la, lo, 10)),
+            ]
+
+            self.stdout.write(f"{size:,} businesses, engine built in {build_ms:.1f} ms")
+            for label, brute, fast in paths:
+                brute_ms = self._time(brute, points)
+                engine_ms = self._time(fast, points)
+                self.stdout.write(
+                    f"  {label:<26} brute force {brute_ms:>8.2f} ms   engine {engine_ms:>8.3f} ms"
+                    f"   ({brute_ms / engine_ms:.0f}x)"
+                )
+
+        self.stdout.write(self.style.SUCCESS('Benchmark complete'))
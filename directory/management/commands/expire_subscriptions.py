@@ -0,0 +1,20 @@
+from django.core.management.base import BaseCommand
+from directory.signals import sweep_expired_subscriptions
+
+class Command(BaseCommand):
+    help = 'Mark lapsed subscriptions expired and clear premium flags (normally run by Celery beat)'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--chunk-size',
+            type=int,
+            default=500,
+            help='Number of subscriptions to expire per batch (default: 500)',
+        )
+
+    def handle(self, *args, **options):
+        report = sweep_expired_subscriptions(max(1, options['chunk_size']))
+        self.stdout.write(self.style.SUCCESS(
+            f"Expired {report['subscriptions_expired']} subscriptions, cleared {report['premium_cleared']} "
+            f"premium flags and notified {report['owners_notified']} owners in {report['duration']}s"
+        ))
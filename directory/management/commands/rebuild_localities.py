@@ -0,0 +1,17 @@
+from django.core.management.base import BaseCommand
+from directory.localities import rebuild_localities
+
+class Command(BaseCommand):
+    help = 'Rebuild the locality gazetteer used for location suggestions'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--chunk-size',
+            type=int,
+            default=2000,
+            help='Businesses read and localities written per batch (default: 2000)',
+        )
+
+    def handle(self, *args, **options):
+        total = rebuild_localities(max(1, options['chunk_size']))
+        self.stdout.write(self.style.SUCCESS(f'Successfully rebuilt {total} localities'))
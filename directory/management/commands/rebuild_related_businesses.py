@@ -0,0 +1,26 @@
+from django.core.management.base import BaseCommand
+from directory.related import BATCH_SIZE, rebuild_related_businesses, refresh_related_businesses
+
+class Command(BaseCommand):
+    help = 'Precompute related-business recommendations'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--incremental',
+            action='store_true',
+            help='Only refresh businesses edited since their recommendations were computed',
+        )
+        parser.add_argument(
+            '--batch-size',
+            type=int,
+            default=BATCH_SIZE,
+            help=f'Businesses scored per NumPy batch (default: {BATCH_SIZE})',
+        )
+
+    def handle(self, *args, **options):
+        batch_size = max(1, options['batch_size'])
+        if options['incremental']:
+            total = refresh_related_businesses(batch_size=batch_size)
+        else:
+            total = rebuild_related_businesses(batch_size)
+        self.stdout.write(self.style.SUCCESS(f'Successfully computed related businesses for {total} listings'))
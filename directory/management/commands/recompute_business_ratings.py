@@ -0,0 +1,35 @@
+from django.core.management.base import BaseCommand
+from directory.models import Business
+from directory.ratings import recompute_ratings
+
+class Command(BaseCommand):
+    help = 'Recompute stored rating aggregates (rating_sum, approved_review_count, avg_rating) on businesses'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--chunk-size',
+            type=int,
+            default=500,
+            help='Number of businesses to recompute per batch (default: 500)',
+        )
+
+    def handle(self, *args, **options):
+        chunk_size = max(1, options['chunk_size'])
+        last_id = 0
+        total = 0
+
+        # Walk the table by primary key so each chunk is an indexed range scan
+        while True:
+            business_ids = list(
+                Business.objects.filter(pk__gt=last_id)
+                .order_by('pk')
+                .values_list('pk', flat=True)[:chunk_size]
+            )
+            if not business_ids:
+                break
+
+            total += recompute_ratings(business_ids)
+            last_id = business_ids[-1]
+            self.stdout.write(f"Recomputed ratings for {total} businesses (up to id {last_id})")
+
+        self.stdout.write(self.style.SUCCESS(f'Successfully recomputed ratings for {total} businesses'))
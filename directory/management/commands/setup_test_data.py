@@ -14,5 +14,6 @@ class Command(BaseCommand):
         # Load fixtures
         call_command('loaddata', 'initial_data')
         call_command('loaddata', 'sample_businesses')
+        call_command('recompute_business_ratings')
         
         self.stdout.write(self.style.SUCCESS('Successfully loaded test data'))
\ No newline at end of file
@@ -0,0 +1,51 @@
+# Generated by Django 5.2.5 on 2026-10-18 11:54
+
+from django.conf import settings
+from django.db import migrations, models
+from django.db.models import Count, Sum
+
+
+def backfill_rating_aggregates(apps, schema_editor):
+    Business = apps.get_model('directory', 'Business')
+    Review = apps.get_model('directory', 'Review')
+    totals = Review.objects.filter(is_approved=True).order_by().values('business_id').annotate(
+        rating_total=Sum('rating'),
+        review_count=Count('id')
+    )
+    for row in totals:
+        Business.objects.filter(pk=row['business_id']).update(
+            rating_sum=row['rating_total'],
+            approved_review_count=row['review_count'],
+            avg_rating=row['rating_total'] / row['review_count'],
+        )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('directory', '0003_add_youtube_url_field'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='business',
+            name='approved_review_count',
+            field=models.PositiveIntegerField(default=0, editable=False),
+        ),
+        migrations.AddField(
+            model_name='business',
+            name='avg_rating',
+            field=models.FloatField(default=0, editable=False),
+        ),
+        migrations.AddField(
+            model_name='business',
+            name='rating_sum',
+            field=models.PositiveIntegerField(default=0, editable=False),
+        ),
+        migrations.AddIndex(
+            model_name='business',
+            index=models.Index(fields=['is_active', 'avg_rating'], name='business_active_rating_idx'),
+        ),
+        migrations.RunPython(backfill_rating_aggregates, migrations.RunPython.noop),
+    ]
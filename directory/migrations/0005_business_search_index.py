@@ -0,0 +1,72 @@
+# Generated by Django 5.2.5 on 2026-10-18 11:56
+
+import django.contrib.postgres.search
+from django.db import migrations
+
+
+PG_FORWARD = [
+    "CREATE INDEX business_search_vector_gin ON directory_business USING gin (search_vector)",
+    """
+    UPDATE directory_business b SET search_vector =
+        setweight(to_tsvector('english', coalesce(b.name, '')), 'A') ||
+        setweight(to_tsvector('english', coalesce((
+            SELECT string_agg(s.name, ' ') FROM directory_service s WHERE s.business_id = b.id
+        ), '')), 'B') ||
+        setweight(to_tsvector('english', coalesce(b.description, '')), 'C')
+    """,
+]
+PG_BACKWARD = [
+    "DROP INDEX IF EXISTS business_search_vector_gin",
+]
+
+SQLITE_FORWARD = [
+    "CREATE VIRTUAL TABLE directory_business_fts USING fts5(name, description, services, tokenize='porter unicode61')",
+    """
+    INSERT INTO directory_business_fts (rowid, name, description, services)
+    SELECT b.id, b.name, b.description, coalesce((
+        SELECT group_concat(s.name, ' ') FROM directory_service s WHERE s.business_id = b.id
+    ), '')
+    FROM directory_business b
+    """,
+]
+SQLITE_BACKWARD = [
+    "DROP TABLE IF EXISTS directory_business_fts",
+]
+
+
+def _run(schema_editor, statements):
+    for statement in statements:
+        schema_editor.execute(statement)
+
+
+def create_search_backend(apps, schema_editor):
+    vendor = schema_editor.connection.vendor
+    if vendor == 'postgresql':
+        _run(schema_editor, PG_FORWARD)
+    elif vendor == 'sqlite':
+        _run(schema_editor, SQLITE_FORWARD)
+
+
+def drop_search_backend(apps, schema_editor):
+    vendor = schema_editor.connection.vendor
+    if vendor == 'postgresql':
+        _run(schema_editor, PG_BACKWARD)
+    elif vendor == 'sqlite':
+        _run(schema_editor, SQLITE_BACKWARD)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('directory', '0004_business_rating_aggregates'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='business',
+            name='search_vector',
+            field=django.contrib.postgres.search.SearchVectorField(editable=False, null=True),
+        ),
+        # The GIN index / FTS5 table are vendor specific, so they live outside the model state
+        migrations.RunPython(create_search_backend, drop_search_backend),
+    ]
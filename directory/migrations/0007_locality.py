@@ -0,0 +1,85 @@
+# Generated by Django 5.2.5 on 2026-10-18 12:04
+
+from django.db import migrations, models
+
+MAX_AREAS_PER_BUSINESS = 4
+IGNORED_AREAS = {'india'}
+
+
+# Frozen copies of the directory.localities key helpers, so this migration
+# doesn't change with the app code
+def _clean(value):
+    return ' '.join((value or '').split())[:100]
+
+def business_localities(city, state, address, pincode):
+    city = _clean(city)
+    state = _clean(state)
+    keys = set()
+    if city:
+        keys.add(('city', city, city, state, ''))
+    if state:
+        keys.add(('state', state, '', state, ''))
+
+    seen = {city.lower(), state.lower()} | IGNORED_AREAS
+    areas = 0
+    for part in (address or '').split(','):
+        area = _clean(part)
+        if len(area) < 3 or area.lower() in seen or any(char.isdigit() for char in area):
+            continue
+        seen.add(area.lower())
+        keys.add(('area', area, city, state, (pincode or '').strip()))
+        areas += 1
+        if areas >= MAX_AREAS_PER_BUSINESS:
+            break
+    return keys
+
+def count_localities(rows):
+    counts = {}
+    for city, state, address, pincode in rows:
+        for kind, name, city_key, state_key, pincode_key in business_localities(city, state, address, pincode):
+            lookup = (kind, name.lower(), city_key, state_key, pincode_key)
+            name, count = counts.get(lookup, (name, 0))
+            counts[lookup] = (name, count + 1)
+    return counts
+
+
+def backfill_localities(apps, schema_editor):
+    Business = apps.get_model('directory', 'Business')
+    Locality = apps.get_model('directory', 'Locality')
+    rows = Business.objects.filter(is_active=True).values_list('city', 'state', 'address', 'pincode')
+    Locality.objects.bulk_create([
+        Locality(
+            kind=kind, name=name, search_name=search_name,
+            city=city, state=state, pincode=pincode, business_count=count
+        )
+        for (kind, search_name, city, state, pincode), (name, count) in count_localities(rows.iterator()).items()
+    ], batch_size=2000)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('directory', '0006_business_geohash'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='Locality',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('kind', models.CharField(choices=[('city', 'City'), ('area', 'Area'), ('state', 'State')], max_length=10)),
+                ('name', models.CharField(max_length=100)),
+                ('search_name', models.CharField(max_length=100)),
+                ('city', models.CharField(blank=True, default='', max_length=100)),
+                ('state', models.CharField(blank=True, default='', max_length=100)),
+                ('pincode', models.CharField(blank=True, default='', max_length=6)),
+                ('business_count', models.PositiveIntegerField(default=0)),
+            ],
+            options={
+                'verbose_name_plural': 'Localities',
+                'indexes': [models.Index(fields=['search_name', 'business_count'], name='locality_prefix_idx', opclasses=['varchar_pattern_ops', 'int4_ops'])],
+                'constraints': [models.UniqueConstraint(fields=('kind', 'search_name', 'city', 'state', 'pincode'), name='locality_unique_key')],
+            },
+        ),
+        migrations.RunPython(backfill_localities, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,19 @@
+# Generated by Django 5.2.5 on 2026-10-18 12:05
+
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('directory', '0007_locality'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='business',
+            index=models.Index(fields=['pincode'], name='business_pincode_idx', opclasses=['varchar_pattern_ops']),
+        ),
+    ]
@@ -0,0 +1,23 @@
+# Generated by Django 5.2.5 on 2026-10-18 12:16
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('directory', '0008_business_pincode_index'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='business',
+            name='primary_image_url',
+            field=models.URLField(blank=True, default='', editable=False, max_length=500),
+        ),
+        migrations.AddField(
+            model_name='business',
+            name='primary_thumbnail_url',
+            field=models.URLField(blank=True, default='', editable=False, max_length=500),
+        ),
+    ]
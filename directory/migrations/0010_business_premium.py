@@ -0,0 +1,44 @@
+# Generated by Django 5.2.5 on 2026-10-18 12:18
+
+from django.conf import settings
+from django.db import migrations, models
+from django.utils import timezone
+
+
+def backfill_premium(apps, schema_editor):
+    Business = apps.get_model('directory', 'Business')
+    UserSubscription = apps.get_model('directory', 'UserSubscription')
+    subscriptions = UserSubscription.objects.filter(
+        business__isnull=False,
+        is_active=True,
+        expiry_date__gt=timezone.now(),
+        plan__price__gt=0
+    ).values_list('business_id', 'expiry_date')
+    for business_id, expiry_date in subscriptions.iterator():
+        Business.objects.filter(pk=business_id).update(is_premium=True, premium_until=expiry_date)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('directory', '0009_business_primary_image_url'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='business',
+            name='is_premium',
+            field=models.BooleanField(default=False, editable=False),
+        ),
+        migrations.AddField(
+            model_name='business',
+            name='premium_until',
+            field=models.DateTimeField(blank=True, editable=False, null=True),
+        ),
+        migrations.AddIndex(
+            model_name='business',
+            index=models.Index(fields=['is_premium', 'premium_until'], name='business_premium_idx'),
+        ),
+        migrations.RunPython(backfill_premium, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,19 @@
+# Generated by Django 5.2.5 on 2026-10-18 12:19
+
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('directory', '0010_business_premium'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='usersubscription',
+            index=models.Index(fields=['payment_status', 'expiry_date'], name='subscription_expiry_idx'),
+        ),
+    ]
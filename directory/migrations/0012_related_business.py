@@ -0,0 +1,30 @@
+# Generated by Django 5.2.5 on 2026-10-18 12:21
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('directory', '0011_subscription_expiry_index'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='RelatedBusiness',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('rank', models.PositiveSmallIntegerField()),
+                ('score', models.FloatField()),
+                ('computed_at', models.DateTimeField(auto_now_add=True)),
+                ('business', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='recommendations', to='directory.business')),
+                ('related', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='recommended_in', to='directory.business')),
+            ],
+            options={
+                'verbose_name_plural': 'Related businesses',
+                'indexes': [models.Index(fields=['business', 'rank'], name='related_business_rank_idx')],
+                'constraints': [models.UniqueConstraint(fields=('business', 'related'), name='related_business_unique_pair')],
+            },
+        ),
+    ]
@@ -0,0 +1,58 @@
+# Generated by Django 5.2.5 on 2026-10-18 12:24
+
+from django.db import migrations, models
+
+SLOT_MINUTES = 15
+WEEK_SLOTS = 7 * 24 * 60 // SLOT_MINUTES
+HEX_DIGITS = '0123456789abcdef'
+
+
+# Frozen copy of directory.hours.encode_week, so this migration doesn't
+# change with the app code
+def _minutes(value):
+    return value.hour * 60 + value.minute
+
+def encode_week(rows):
+    bits = bytearray(WEEK_SLOTS)
+    for day, open_time, close_time, is_closed in rows:
+        if is_closed:
+            continue
+        opens = (day - 1) * 24 * 60 + _minutes(open_time)
+        span = _minutes(close_time) - _minutes(open_time)
+        if span <= 0:
+            span += 24 * 60
+        for slot in range(opens // SLOT_MINUTES, -(-(opens + span) // SLOT_MINUTES)):
+            bits[slot % WEEK_SLOTS] = 1
+
+    return ''.join(
+        HEX_DIGITS[bits[i] << 3 | bits[i + 1] << 2 | bits[i + 2] << 1 | bits[i + 3]]
+        for i in range(0, WEEK_SLOTS, 4)
+    )
+
+
+def backfill_weekly_hours(apps, schema_editor):
+    BusinessHours = apps.get_model('directory', 'BusinessHours')
+    Business = apps.get_model('directory', 'Business')
+    schedules = {}
+    for business_id, *row in BusinessHours.objects.order_by('business_id').values_list(
+        'business_id', 'day', 'open_time', 'close_time', 'is_closed'
+    ).iterator():
+        schedules.setdefault(business_id, []).append(row)
+    for business_id, rows in schedules.items():
+        Business.objects.filter(pk=business_id).update(weekly_hours=encode_week(rows))
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('directory', '0012_related_business'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='business',
+            name='weekly_hours',
+            field=models.CharField(blank=True, default='', editable=False, max_length=168),
+        ),
+        migrations.RunPython(backfill_weekly_hours, migrations.RunPython.noop),
+    ]
@@ -2,7 +2,9 @@ from django.db import models
 from django.contrib.auth.models import User
 from django.core.validators import MinValueValidator, MaxValueValidator
 from django.utils import timezone
+from django.contrib.postgres.search import SearchVectorField
 from cloudinary_storage.storage import MediaCloudinaryStorage
+from .geo import business_geohash
 
 class Category(models.Model):
     name = models.CharField(max_length=100)
@@ -36,6 +38,19 @@ class Category(models.Model):
     def __str__(self):
         return self.name
 
+# Using only 3 high-quality landscape model images as fallbacks
+PORTRAIT_FALLBACKS = [
+    "https://images.unsplash.com/photo-1534528741775-53994a69daeb?ixlib=rb-1.2.1&auto=format&fit=crop&w=1000&h=600&q=80", # Professional female model with blue background
+    "https://images.unsplash.com/photo-1529626455594-4ff0802cfb7e?ixlib=rb-1.2.1&auto=format&fit=crop&w=1000&h=600&q=80", # Female model in casual outfit, landscape orientation
+    "https://images.unsplash.com/photo-1488161628813-04466f872be2?ixlib=rb-1.2.1&auto=format&fit=crop&w=1000&h=600&q=80", # Professional model portrait in landscape format
+]
+
+def fallback_image_url(business_id):
+    """Placeholder image for a business without a primary image"""
+    # Use business ID to deterministically select a fallback image
+    # This ensures the same business always gets the same fallback image
+    return PORTRAIT_FALLBACKS[business_id % len(PORTRAIT_FALLBACKS)]
+
 class Business(models.Model):
     # Basic Info
     owner = models.ForeignKey(User, on_delete=models.CASCADE)
@@ -55,6 +70,8 @@ class Business(models.Model):
     location_name = models.CharField(max_length=255, blank=True, default='')
     place_id = models.CharField(max_length=255, blank=True, default='')
     formatted_address = models.TextField(blank=True, default='')
+    # Derived from latitude/longitude on save, see directory.geo
+    geohash = models.CharField(max_length=12, blank=True, default='', db_index=True, editable=False)
     
     # Contact Info
     phone = models.CharField(max_length=15)
@@ -114,61 +131,65 @@ class Business(models.Model):
     coupon_discount = models.IntegerField(default=20, help_text="Discount percentage for coupons (5-50%)", 
                                         validators=[MinValueValidator(5), MaxValueValidator(50)])
 
+    # Denormalized approved-review aggregates, maintained by directory.ratings
+    rating_sum = models.PositiveIntegerField(default=0, editable=False)
+    approved_review_count = models.PositiveIntegerField(default=0, editable=False)
+    avg_rating = models.FloatField(default=0, editable=False)
+    # Copied from the primary BusinessImage, see directory.images
+    primary_image_url = models.URLField(max_length=500, blank=True, default='', editable=False)
+    primary_thumbnail_url = models.URLField(max_length=500, blank=True, default='', editable=False)
+    # Copied from the active paid subscription, see directory.premium
+    is_premium = models.BooleanField(default=False, editable=False)
+    premium_until = models.DateTimeField(null=True, blank=True, editable=False)
+    # Quarter-hour bitmap of BusinessHours, see directory.hours
+    weekly_hours = models.CharField(max_length=168, blank=True, default='', editable=False)
+
+    # Full-text document over name, services and description (PostgreSQL only;
+    # its GIN index and the SQLite FTS5 fallback are created in migration 0005)
+    search_vector = SearchVectorField(null=True, editable=False)
+
     class Meta:
         verbose_name_plural = "Businesses"
+        indexes = [
+            models.Index(fields=['is_active', 'avg_rating'], name='business_active_rating_idx'),
+            models.Index(fields=['latitude', 'longitude'], name='business_lat_lng_idx'),
+            models.Index(fields=['pincode'], name='business_pincode_idx', opclasses=['varchar_pattern_ops']),
+            models.Index(fields=['is_premium', 'premium_until'], name='business_premium_idx'),
+        ]
         
     def __str__(self):
         return self.name
 
+    def save(self, *args, **kwargs):
+        # The geohash cell follows the coordinates; a partial save that
+        # touches them writes the cell too
+        update_fields = kwargs.get('update_fields')
+        if update_fields is None or {'latitude', 'longitude'} & set(update_fields):
+            self.geohash = business_geohash(self)
+            if update_fields is not None:
+                kwargs['update_fields'] = {*update_fields, 'geohash'}
+        super().save(*args, **kwargs)
+
     def get_primary_image(self):
         return self.images.filter(is_primary=True).first()
 
     def get_primary_image_url(self):
-        primary_image = self.get_primary_image()
-        try:
-            if (primary_image and hasattr(primary_image.image, 'url')):
-                # Try to access the URL - if it fails, we'll use the fallback
-                url = primary_image.image.url
-                return url
-        except (ValueError, AttributeError, IOError) as e:
-            # Log the error but continue to fallback
-            import logging
-            logger = logging.getLogger(__name__)
-            logger.error(f"Error retrieving image URL for business {self.id}: {str(e)}")
-    
-        # Using only 3 high-quality landscape model images as fallbacks
-        portrait_fallbacks = [
-            "https://images.unsplash.com/photo-1534528741775-53994a69daeb?ixlib=rb-1.2.1&auto=format&fit=crop&w=1000&h=600&q=80", # Professional female model with blue background
-            "https://images.unsplash.com/photo-1529626455594-4ff0802cfb7e?ixlib=rb-1.2.1&auto=format&fit=crop&w=1000&h=600&q=80", # Female model in casual outfit, landscape orientation
-            "https://images.unsplash.com/photo-1488161628813-04466f872be2?ixlib=rb-1.2.1&auto=format&fit=crop&w=1000&h=600&q=80", # Professional model portrait in landscape format
-        ]
-        
-        # Use business ID to deterministically select a fallback image
-        # This ensures the same business always gets the same fallback image
-        fallback_index = self.id % len(portrait_fallbacks)
-        return portrait_fallbacks[fallback_index]
+        return self.primary_image_url or fallback_image_url(self.id)
+
+    def get_primary_thumbnail_url(self):
+        return self.primary_thumbnail_url or fallback_image_url(self.id)
 
     @property
     def has_premium_features(self):
         """Check if business has premium features"""
-        subscription = UserSubscription.objects.filter(
-            business=self, 
-            is_active=True,
-            expiry_date__gt=timezone.now()
-        ).first()
-        
-        if subscription and subscription.plan.price > 0:
-            return True
-        return False
+        return self.is_premium and self.premium_until is not None and self.premium_until > timezone.now()
 
     def get_related_businesses(self, limit=6):
-        """Get related businesses in the same category, excluding current business"""
+        """Precomputed related businesses, best match first (see directory.related)"""
         return Business.objects.filter(
-            category=self.category,
+            recommended_in__business=self,
             is_active=True
-        ).exclude(
-            id=self.id
-        ).order_by('-created_at')[:limit]
+        ).order_by('recommended_in__rank')[:limit]
 
 class BusinessImage(models.Model):
     business = models.ForeignKey(Business, on_delete=models.CASCADE, related_name='images')
@@ -289,6 +310,11 @@ class UserSubscription(models.Model):
     is_active = models.BooleanField(default=False)  # Only active after admin verification
     affiliate_code = models.CharField(max_length=8, blank=True, null=True)
     
+    class Meta:
+        indexes = [
+            models.Index(fields=['payment_status', 'expiry_date'], name='subscription_expiry_idx'),
+        ]
+
     def is_expired(self):
         return timezone.now() > self.expiry_date
     
@@ -307,3 +333,59 @@ class UserSubscription(models.Model):
     
     def __str__(self):
         return f"{self.user.username}'s {self.plan.name} subscription"
+
+class Locality(models.Model):
+    """Gazetteer of cities, states and address areas with active business counts,
+    maintained by directory.localities"""
+    KIND_CHOICES = (
+        ('city', 'City'),
+        ('area', 'Area'),
+        ('state', 'State'),
+    )
+    
+    kind = models.CharField(max_length=10, choices=KIND_CHOICES)
+    name = models.CharField(max_length=100)
+    search_name = models.CharField(max_length=100)  # Lowercased name for prefix lookups
+    city = models.CharField(max_length=100, blank=True, default='')
+    state = models.CharField(max_length=100, blank=True, default='')
+    pincode = models.CharField(max_length=6, blank=True, default='')
+    business_count = models.PositiveIntegerField(default=0)
+    
+    class Meta:
+        verbose_name_plural = "Localities"
+        constraints = [
+            models.UniqueConstraint(
+                fields=['kind', 'search_name', 'city', 'state', 'pincode'],
+                name='locality_unique_key'
+            ),
+        ]
+        indexes = [
+            models.Index(
+                fields=['search_name', 'business_count'],
+                name='locality_prefix_idx',
+                opclasses=['varchar_pattern_ops', 'int4_ops']
+            ),
+        ]
+    
+    def __str__(self):
+        return f"{self.name} ({self.get_kind_display()})"
+
+class RelatedBusiness(models.Model):
+    """Precomputed top related listings per business, maintained by directory.related"""
+    business = models.ForeignKey(Business, on_delete=models.CASCADE, related_name='recommendations')
+    related = models.ForeignKey(Business, on_delete=models.CASCADE, related_name='recommended_in')
+    rank = models.PositiveSmallIntegerField()
+    score = models.FloatField()
+    computed_at = models.DateTimeField(auto_now_add=True)
+    
+    class Meta:
+        verbose_name_plural = "Related businesses"
+        constraints = [
+            models.UniqueConstraint(fields=['business', 'related'], name='related_business_unique_pair'),
+        ]
+        indexes = [
+            models.Index(fields=['business', 'rank'], name='related_business_rank_idx'),
+        ]
+    
+    def __str__(self):
+        return f"{self.business_id} -> {self.related_id} ({self.score:.3f})"
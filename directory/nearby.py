@@ -0,0 +1,235 @@
+"""
+Read-mostly in-process engine for "near me" lookups.
+
+Active business coordinates are held in NumPy arrays, partitioned by
+category and sorted by latitude, so a radius query only runs the vectorized
+haversine over the latitude band of each partition. Changes made in this
+process go into a small overlay until the next reload; other workers reload
+when the shared version stamp moves.
+"""
+import threading
+import time
+from collections import namedtuple
+
+import numpy as np
+from django.db.models import FloatField
+from django.db.models.functions import Cast
+
+from .cache_utils import get_cache_version, bump_cache_version
+from .geo import EARTH_RADIUS_KM, bounding_box
+from .models import Business
+
+VERSION_NAME = 'nearby_engine'
+VERSION_CHECK_INTERVAL = 10  # seconds between shared version checks
+MIN_RELOAD_INTERVAL = 60     # seconds between reloads triggered by other workers
+COMPACT_THRESHOLD = 1000     # overlay size that forces a reload
+MAX_RADIUS_RESULTS = 5000    # cap on ids handed to the ORM
+HALF_CIRCUMFERENCE_KM = 20038
+
+Partition = namedtuple('Partition', ['ids', 'lat_deg', 'lat_rad', 'lng_rad', 'cos_lat'])
+
+
+def _build_partition(ids, lats, lngs):
+    order = np.argsort(lats, kind='stable')
+    lat_deg = lats[order]
+    lat_rad = np.radians(lat_deg)
+    return Partition(ids[order], lat_deg, lat_rad, np.radians(lngs[order]), np.cos(lat_rad))
+
+def _haversine(lat_rad, lng_rad, cos_lat, latitude, longitude):
+    query_lat = np.radians(latitude)
+    dlat = lat_rad - query_lat
+    dlng = lng_rad - np.radians(longitude)
+    a = np.sin(dlat / 2) ** 2 + np.cos(query_lat) * cos_lat * np.sin(dlng / 2) ** 2
+    return 2 * EARTH_RADIUS_KM * np.arcsin(np.sqrt(np.minimum(a, 1.0)))
+
+
+class NearbyEngine:
+    def __init__(self, auto_reload=True):
+        # auto_reload=False keeps whatever load_arrays() was given (benchmarks)
+        self._auto_reload = auto_reload
+        self._lock = threading.RLock()
+        self._partitions = {}
+        self._overlay = {}
+        self._loaded = False
+        self._version = None
+        self._checked_at = 0.0
+        self._loaded_at = 0.0
+
+    # ------------------------------------------------------------------
+    # Loading
+    # ------------------------------------------------------------------
+    def load_arrays(self, ids, lats, lngs, category_ids, version=None):
+        """Replace the engine contents with the given coordinate arrays"""
+        ids = np.asarray(ids, dtype=np.int64)
+        lats = np.asarray(lats, dtype=np.float64)
+        lngs = np.asarray(lngs, dtype=np.float64)
+        category_ids = np.asarray(category_ids, dtype=np.int64)
+
+        partitions = {}
+        if len(ids):
+            order = np.argsort(category_ids, kind='stable')
+            categories, starts = np.unique(category_ids[order], return_index=True)
+            bounds = list(starts[1:]) + [len(order)]
+            for category_id, start, end in zip(categories, starts, bounds):
+                rows = order[start:end]
+                partitions[int(category_id)] = _build_partition(ids[rows], lats[rows], lngs[rows])
+
+        with self._lock:
+            self._partitions = partitions
+            self._overlay = {}
+            self._loaded = True
+            self._version = version
+            self._loaded_at = self._checked_at = time.monotonic()
+
+    def reload(self):
+        """Load all active businesses with coordinates from the database"""
+        version = get_cache_version(VERSION_NAME)
+        rows = list(Business.objects.filter(
+            is_active=True,
+            latitude__isnull=False,
+            longitude__isnull=False
+        ).annotate(
+            lat=Cast('latitude', FloatField()),
+            lng=Cast('longitude', FloatField())
+        ).values_list('id', 'lat', 'lng', 'category_id'))
+
+        columns = np.array(rows, dtype=np.float64).reshape(-1, 4)
+        self.load_arrays(columns[:, 0], columns[:, 1], columns[:, 2], columns[:, 3], version)
+
+    def _ensure_current(self):
+        if not self._auto_reload:
+            return
+        now = time.monotonic()
+        if self._loaded and now - self._checked_at < VERSION_CHECK_INTERVAL:
+            return
+        self._checked_at = now
+        if not self._loaded:
+            self.reload()
+            return
+        version = get_cache_version(VERSION_NAME)
+        if version != self._version and (
+            self._version is None or now - self._loaded_at >= MIN_RELOAD_INTERVAL
+        ):
+            self.reload()
+
+    # ------------------------------------------------------------------
+    # Incremental updates
+    # ------------------------------------------------------------------
+    def business_changed(self, business, deleted=False):
+        """Record a coordinate/status/category change made in this process"""
+        with self._lock:
+            if self._loaded:
+                if deleted or not business.is_active or business.latitude is None or business.longitude is None:
+                    self._overlay[business.id] = None
+                else:
+                    self._overlay[business.id] = (
+                        float(business.latitude), float(business.longitude), business.category_id
+                    )
+
+            version = bump_cache_version(VERSION_NAME)
+            if self._version is not None and version == self._version + 1 and len(self._overlay) < COMPACT_THRESHOLD:
+                self._version = version
+            else:
+                # Other writers or a large overlay: reload on the next query
+                self._version = None
+                self._checked_at = 0.0
+
+    # ------------------------------------------------------------------
+    # Queries
+    # ------------------------------------------------------------------
+    def _radius_hits(self, latitude, longitude, radius_km, category_ids):
+        min_lat, max_lat, _, _ = bounding_box(latitude, longitude, radius_km)
+        overlay = self._overlay
+        overridden = np.fromiter(overlay.keys(), dtype=np.int64, count=len(overlay))
+
+        keys = self._partitions.keys() if category_ids is None else category_ids
+        found_ids, found_distances = [], []
+        for category_id in keys:
+            partition = self._partitions.get(int(category_id))
+            if partition is None:
+                continue
+            start = np.searchsorted(partition.lat_deg, min_lat, side='left')
+            end = np.searchsorted(partition.lat_deg, max_lat, side='right')
+            if start == end:
+                continue
+            block = slice(start, end)
+            distances = _haversine(
+                partition.lat_rad[block], partition.lng_rad[block], partition.cos_lat[block],
+                latitude, longitude
+            )
+            mask = distances <= radius_km
+            ids = partition.ids[block]
+            if len(overridden):
+                mask &= ~np.isin(ids, overridden)
+            found_ids.append(ids[mask])
+            found_distances.append(distances[mask])
+
+        # Rows changed in this process since the last load
+        wanted = None if category_ids is None else {int(c) for c in category_ids}
+        pending = [
+            (business_id, row[0], row[1]) for business_id, row in overlay.items()
+            if row is not None and (wanted is None or row[2] in wanted)
+        ]
+        if pending:
+            pending_ids = np.array([row[0] for row in pending], dtype=np.int64)
+            lat_rad = np.radians([row[1] for row in pending])
+            distances = _haversine(
+                lat_rad, np.radians([row[2] for row in pending]), np.cos(lat_rad),
+                latitude, longitude
+            )
+            mask = distances <= radius_km
+            found_ids.append(pending_ids[mask])
+            found_distances.append(distances[mask])
+
+        if not found_ids:
+            return np.empty(0, dtype=np.int64), np.empty(0)
+        return np.concatenate(found_ids), np.concatenate(found_distances)
+
+    def within_radius(self, latitude, longitude, radius_km, category_ids=None, after=None, limit=MAX_RADIUS_RESULTS):
+        """
+        [(business_id, distance_km), ...] within radius_km, nearest first.
+        `after` is a (distance_km, id) keyset position to continue from.
+        """
+        self._ensure_current()
+        with self._lock:
+            ids, distances = self._radius_hits(latitude, longitude, radius_km, category_ids)
+
+        if after is not None:
+            last_distance, last_id = after
+            keep = (distances > last_distance) | ((distances == last_distance) & (ids > last_id))
+            ids, distances = ids[keep], distances[keep]
+
+        order = np.lexsort((ids, distances))
+        if limit is not None:
+            order = order[:limit]
+        return list(zip(ids[order].tolist(), distances[order].tolist()))
+
+    def nearest(self, latitude, longitude, k=10, category_ids=None, max_radius_km=HALF_CIRCUMFERENCE_KM):
+        """The k nearest businesses, found by widening the search radius"""
+        radius = min(5.0, max_radius_km)
+        while True:
+            hits = self.within_radius(latitude, longitude, radius, category_ids, limit=k)
+            if len(hits) >= k or radius >= max_radius_km:
+                return hits
+            radius = min(radius * 4, max_radius_km)
+
+
+nearby_engine = NearbyEngine()
+
+def filter_hits(queryset, hits):
+    """Keep the (id, distance_km) hits whose business also matches queryset"""
+    matching = set(queryset.filter(
+        pk__in=[business_id for business_id, _ in hits]
+    ).values_list('pk', flat=True))
+    return [hit for hit in hits if hit[0] in matching]
+
+def hydrate_hits(queryset, hits):
+    """Business objects for (id, distance_km) hits, in hit order, with distance_km set"""
+    businesses = queryset.in_bulk([business_id for business_id, _ in hits])
+    rows = []
+    for business_id, distance in hits:
+        business = businesses.get(business_id)
+        if business is not None:
+            business.distance_km = distance
+            rows.append(business)
+    return rows
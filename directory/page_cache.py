@@ -0,0 +1,62 @@
+"""
+Full-page cache of business_detail for anonymous visitors.
+
+Anonymous GETs without a query string all receive the same HTML, so the
+rendered page is stored per business under page_version(): its business
+tag, which the save signals of the business and everything shown on it
+bump, the categories and related tags, and the weekday (today's hours). Per-visitor bytes are kept out of
+the stored copy: CSRF tokens are punched out and filled in on every hit,
+and visitors with flash messages or a pending review in their session get
+a live render.
+"""
+import re
+from django.contrib.messages import get_messages
+from django.http import HttpResponse
+from django.middleware.csrf import get_token
+from django.utils import timezone
+from .cache_utils import CATEGORIES_TAG, RELATED_TAG, business_tag, get_tag_versions, tiered_get, tiered_set
+
+PAGE_CACHE_TTL = 600
+CSRF_PLACEHOLDER = '__csrf_token__'
+CSRF_INPUT = re.compile(r'(name="csrfmiddlewaretoken" value=")[^"]*(")')
+
+
+def page_version(business_id):
+    """Version of everything the anonymous page shows, without a query"""
+    tags = [business_tag(business_id), CATEGORIES_TAG, RELATED_TAG]
+    versions = get_tag_versions(tags)
+    return '.'.join(str(versions[tag]) for tag in tags) + f':{timezone.localdate().isoweekday()}'
+
+def _cache_key(business_id):
+    return f'business_page:{business_id}:{page_version(business_id)}'
+
+def is_cacheable(request):
+    """Whether this request gets the shared anonymous copy of the page"""
+    if request.method != 'GET' or request.GET or request.user.is_authenticated:
+        return False
+    # len() doesn't mark the messages as read
+    if len(get_messages(request)):
+        return False
+    return not request.session.get('reviewer_email')
+
+def cached_page(request, business_id):
+    """The stored page with this visitor's CSRF token filled in, or None"""
+    content = tiered_get(_cache_key(business_id))
+    if content is None:
+        return None
+    if CSRF_PLACEHOLDER in content:
+        content = content.replace(CSRF_PLACEHOLDER, get_token(request))
+    return HttpResponse(content)
+
+def store_page(business, response):
+    """Keep a rendered anonymous page, with CSRF tokens punched out"""
+    if response.status_code != 200:
+        return
+    timeout = PAGE_CACHE_TTL
+    # Premium sections disappear when the entitlement lapses, not on a signal
+    if business.premium_until:
+        timeout = min(timeout, int((business.premium_until - timezone.now()).total_seconds()))
+    if timeout <= 0:
+        return
+    content = CSRF_INPUT.sub(rf'\g<1>{CSRF_PLACEHOLDER}\g<2>', response.content.decode(response.charset))
+    tiered_set(_cache_key(business.pk), content, timeout)
@@ -0,0 +1,78 @@
+"""
+Keyset (cursor) pagination for infinite scroll.
+
+A cursor is an opaque token holding the sort key values of the last row
+served. The next page filters past that row instead of using OFFSET, so
+deep pages cost the same as the first one.
+"""
+import base64
+import binascii
+import json
+import math
+from datetime import datetime
+from django.core.serializers.json import DjangoJSONEncoder
+from django.db.models import Q
+from django.utils.dateparse import parse_datetime
+
+
+def _integer(value):
+    return value if isinstance(value, int) and not isinstance(value, bool) else None
+
+def _number(value):
+    if isinstance(value, (int, float)) and not isinstance(value, bool) and math.isfinite(value):
+        return float(value)
+    return None
+
+def _timestamp(value):
+    if not isinstance(value, str):
+        return None
+    try:
+        return parse_datetime(value)
+    except ValueError:
+        return None
+
+# Parsers for the sort keys a cursor may carry; None marks an invalid value
+CURSOR_FIELDS = {
+    'id': _integer,
+    'created_at': _timestamp,
+    'distance_km': _number,
+    'search_rank': _number,
+}
+
+def encode_cursor(values):
+    # isoformat() keeps the microseconds DjangoJSONEncoder would cut to
+    # milliseconds, so rows created within the same millisecond aren't skipped
+    values = [value.isoformat() if isinstance(value, datetime) else value for value in values]
+    payload = json.dumps(values, cls=DjangoJSONEncoder, separators=(',', ':'))
+    return base64.urlsafe_b64encode(payload.encode()).decode().rstrip('=')
+
+def decode_cursor(cursor, ordering):
+    """Sort key values from encode_cursor, or None if the cursor is malformed"""
+    if not cursor:
+        return None
+    try:
+        padded = cursor + '=' * (-len(cursor) % 4)
+        values = json.loads(base64.urlsafe_b64decode(padded.encode()))
+    except (binascii.Error, UnicodeError, ValueError):
+        return None
+    if not isinstance(values, list) or len(values) != len(ordering):
+        return None
+
+    parsed = []
+    for field, value in zip(ordering, values):
+        value = CURSOR_FIELDS[field.lstrip('-')](value)
+        if value is None:
+            return None
+        parsed.append(value)
+    return parsed
+
+def after_filter(ordering, values):
+    """Q matching rows that sort after `values` under `ordering`"""
+    condition = Q()
+    equal = {}
+    for field, value in zip(ordering, values):
+        name = field.lstrip('-')
+        lookup = 'lt' if field.startswith('-') else 'gt'
+        condition |= Q(**equal, **{f'{name}__{lookup}': value})
+        equal[name] = value
+    return condition
@@ -0,0 +1,104 @@
+"""
+Sorted pincode index of active listings with per-pincode counts.
+
+Each worker holds the arrays in memory and answers prefix queries with
+bisect. The built index is also stored in the shared cache under the current
+version stamp, so after a change only one worker has to query the database.
+"""
+import threading
+import time
+from bisect import bisect_left
+from django.core.cache import cache
+from django.db.models import Count
+from .cache_utils import get_cache_version, bump_cache_version
+from .models import Business
+
+VERSION_NAME = 'pincode_index'
+VERSION_CHECK_INTERVAL = 5  # seconds between shared version checks
+CACHE_TTL = 3600
+MAX_FILTER_PINCODES = 500   # beyond this a prefix filter falls back to startswith
+
+
+class PincodeIndex:
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._pincodes = []
+        self._counts = []
+        self._version = None
+        self._checked_at = 0.0
+
+    def _build(self):
+        rows = Business.objects.filter(is_active=True).exclude(pincode='').values(
+            'pincode'
+        ).annotate(total=Count('id')).order_by('pincode').values_list('pincode', 'total')
+        pincodes, counts = [], []
+        for pincode, total in rows:
+            pincodes.append(pincode)
+            counts.append(total)
+        return pincodes, counts
+
+    def _ensure_current(self):
+        now = time.monotonic()
+        if self._version is not None and now - self._checked_at < VERSION_CHECK_INTERVAL:
+            return
+        version = get_cache_version(VERSION_NAME)
+        self._checked_at = now
+        if version == self._version:
+            return
+
+        cache_key = f'{VERSION_NAME}:{version}'
+        arrays = cache.get(cache_key)
+        if arrays is None:
+            arrays = self._build()
+            cache.set(cache_key, arrays, CACHE_TTL)
+        with self._lock:
+            self._pincodes, self._counts = arrays
+            self._version = version
+
+    def current_version(self):
+        """Version stamp of the index lookups are served from"""
+        self._ensure_current()
+        return self._version
+
+    def invalidate(self):
+        """Make every worker pick up a fresh index on its next lookup"""
+        bump_cache_version(VERSION_NAME)
+        self._checked_at = 0.0
+
+    def _range(self, prefix):
+        start = bisect_left(self._pincodes, prefix)
+        # Pincodes are digits, so '~' sorts after every completion of the prefix
+        end = bisect_left(self._pincodes, prefix + '~', lo=start)
+        return start, end
+
+    def suggestions(self, prefix, limit=10):
+        """[(pincode, business_count), ...] starting with prefix, in pincode order"""
+        self._ensure_current()
+        with self._lock:
+            start, end = self._range(prefix)
+            end = min(end, start + limit)
+            return list(zip(self._pincodes[start:end], self._counts[start:end]))
+
+    def matching(self, prefix, limit=None):
+        """Every indexed pincode starting with prefix, or None if there are more than limit"""
+        self._ensure_current()
+        with self._lock:
+            start, end = self._range(prefix)
+            if limit is not None and end - start > limit:
+                return None
+            return self._pincodes[start:end]
+
+
+pincode_index = PincodeIndex()
+
+def filter_by_pincode(queryset, pincode):
+    """Restrict a Business queryset to a pincode or pincode prefix"""
+    pincode = pincode.strip()
+    if len(pincode) == 6:
+        return queryset.filter(pincode=pincode)
+    # Expand the prefix to the exact pincodes it covers so the lookup is an
+    # indexed IN, unless the prefix is too broad
+    pincodes = pincode_index.matching(pincode, MAX_FILTER_PINCODES)
+    if pincodes is None:
+        return queryset.filter(pincode__startswith=pincode)
+    return queryset.filter(pincode__in=pincodes)
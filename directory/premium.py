@@ -0,0 +1,97 @@
+"""
+Materialized premium entitlement on Business.
+
+is_premium / premium_until are copied from the business's subscription
+whenever the subscription row changes, so templates and listings read a
+column instead of querying UserSubscription per business. premium_until is
+checked on read as well, and lapsed subscriptions and flags are swept in
+bulk by a scheduled task.
+"""
+from django.db import transaction
+from django.utils import timezone
+from .cache_utils import business_tag, invalidate_tags
+from .models import Business, UserSubscription
+
+
+def entitling_subscriptions(now=None):
+    """Subscriptions that make their business premium: active, unexpired and paid"""
+    return UserSubscription.objects.filter(
+        is_active=True,
+        expiry_date__gt=now or timezone.now(),
+        plan__price__gt=0
+    )
+
+def premium_entitlement(business_id):
+    """(is_premium, premium_until) from the business's active paid subscription"""
+    expiry_date = entitling_subscriptions().filter(
+        business_id=business_id
+    ).values_list('expiry_date', flat=True).first()
+    if expiry_date is None:
+        return False, None
+    return True, expiry_date
+
+def refresh_premium(business_id):
+    """Recompute the premium columns of one business"""
+    if business_id is None:
+        return
+    is_premium, premium_until = premium_entitlement(business_id)
+    # update() keeps this out of the Business save signals
+    Business.objects.filter(pk=business_id).update(is_premium=is_premium, premium_until=premium_until)
+
+def premium_businesses(queryset):
+    """Restrict a Business queryset to ones with unexpired premium features"""
+    return queryset.filter(is_premium=True, premium_until__gt=timezone.now())
+
+def expire_premium():
+    """Clear the flag on every business whose entitlement has lapsed; returns the count"""
+    business_ids = list(Business.objects.filter(
+        is_premium=True, premium_until__lte=timezone.now()
+    ).values_list('pk', flat=True))
+    cleared = Business.objects.filter(pk__in=business_ids).update(is_premium=False, premium_until=None)
+    invalidate_tags(*(business_tag(business_id) for business_id in business_ids))
+    return cleared
+
+def expire_subscriptions(chunk_size=500):
+    """
+    Mark lapsed subscriptions expired and clear the premium flags of their
+    businesses that no subscription entitles any more, with set-based
+    updates, a pk-ordered chunk at a time. Returns
+    (subscriptions expired, businesses cleared, ids of the subscriptions
+    that were active until now).
+    """
+    now = timezone.now()
+    last_id = 0
+    expired = cleared = 0
+    lapsed_ids = []
+
+    while True:
+        rows = list(
+            UserSubscription.objects.filter(pk__gt=last_id, expiry_date__lte=now)
+            .exclude(payment_status='expired')
+            .order_by('pk')
+            .values_list('pk', 'business_id', 'is_active')[:chunk_size]
+        )
+        if not rows:
+            break
+
+        subscription_ids = [pk for pk, _, _ in rows]
+        business_ids = [business_id for _, business_id, _ in rows if business_id]
+        # update() skips the UserSubscription receivers; the flags are cleared here
+        with transaction.atomic():
+            expired += UserSubscription.objects.filter(pk__in=subscription_ids).update(
+                payment_status='expired', is_active=False
+            )
+            still_entitled = entitling_subscriptions(now).filter(
+                business_id__in=business_ids
+            ).values('business_id')
+            cleared += Business.objects.filter(pk__in=business_ids, is_premium=True).exclude(
+                pk__in=still_entitled
+            ).update(is_premium=False, premium_until=None)
+        invalidate_tags(*(business_tag(business_id) for business_id in business_ids))
+
+        lapsed_ids.extend(pk for pk, _, is_active in rows if is_active)
+        last_id = subscription_ids[-1]
+
+    # Flags whose subscription was already marked expired or removed
+    cleared += expire_premium()
+    return expired, cleared, lapsed_ids
@@ -0,0 +1,124 @@
+from django.core.cache import cache
+from django.db import transaction
+from django.db.models import Avg, Case, When, F, Q, Sum, Count, Value, FloatField
+from django.db.models.functions import Cast
+from django.utils import timezone
+from .cache_utils import business_tag, get_tag_versions, invalidate_tags
+from .models import Business, Review
+
+RATING_CACHE_TTL = 60 * 60  # Entries are keyed on the business tag
+
+
+def apply_rating_delta(business_id, sum_delta, count_delta):
+    """Shift a business's stored rating aggregates in a single UPDATE"""
+    if not sum_delta and not count_delta:
+        return
+
+    # SET expressions read the pre-update row, so the average is computed
+    # from the shifted values in the same statement
+    new_count = F('approved_review_count') + count_delta
+    # update() skips auto_now; updated_at marks the related rows stale
+    Business.objects.filter(pk=business_id).update(
+        updated_at=timezone.now(),
+        rating_sum=F('rating_sum') + sum_delta,
+        approved_review_count=new_count,
+        avg_rating=Case(
+            When(
+                Q(approved_review_count__gt=-count_delta),
+                then=Cast(F('rating_sum') + sum_delta, FloatField()) / new_count,
+            ),
+            default=Value(0.0),
+            output_field=FloatField(),
+        ),
+    )
+
+def recompute_ratings(business_ids):
+    """Rebuild stored rating aggregates for the given businesses from scratch"""
+    business_ids = list(business_ids)
+    totals = {
+        row['business_id']: row
+        for row in Review.objects.filter(
+            business_id__in=business_ids,
+            is_approved=True
+        ).order_by().values('business_id').annotate(
+            rating_total=Sum('rating'),
+            review_count=Count('id')
+        )
+    }
+
+    now = timezone.now()
+    businesses = []
+    for business_id in business_ids:
+        row = totals.get(business_id)
+        rating_sum = row['rating_total'] if row else 0
+        review_count = row['review_count'] if row else 0
+        businesses.append(Business(
+            pk=business_id,
+            rating_sum=rating_sum,
+            approved_review_count=review_count,
+            avg_rating=rating_sum / review_count if review_count else 0.0,
+            updated_at=now,
+        ))
+
+    with transaction.atomic():
+        Business.objects.bulk_update(
+            businesses, ['rating_sum', 'approved_review_count', 'avg_rating', 'updated_at']
+        )
+    # bulk_update skips the save signals that bump the business tags
+    invalidate_tags(*(business_tag(business_id) for business_id in business_ids))
+    return len(businesses)
+
+def approve_review_queryset(queryset):
+    """Approve reviews in bulk and fold them into the stored aggregates"""
+    pending = queryset.filter(is_approved=False)
+
+    with transaction.atomic():
+        deltas = list(pending.order_by().values('business_id').annotate(
+            rating_total=Sum('rating'),
+            review_count=Count('id')
+        ))
+        updated = pending.update(is_approved=True)
+        for row in deltas:
+            apply_rating_delta(row['business_id'], row['rating_total'], row['review_count'])
+    return updated
+
+def business_ratings(business_ids):
+    """
+    {business_id: {'avg_rating', 'count'}} over approved reviews, for a
+    whole page of businesses: one get_many for the cached entries and one
+    grouped query for the misses, which are written back with set_many.
+    """
+    business_ids = list(dict.fromkeys(business_ids))
+    if not business_ids:
+        return {}
+
+    versions = get_tag_versions([business_tag(business_id) for business_id in business_ids])
+    keys = {
+        business_id: f'business_rating:{business_id}:{versions[business_tag(business_id)]}'
+        for business_id in business_ids
+    }
+    found = cache.get_many(list(keys.values()))
+    ratings = {business_id: found[key] for business_id, key in keys.items() if key in found}
+
+    missing = [business_id for business_id in business_ids if business_id not in ratings]
+    if missing:
+        rows = {
+            row['business_id']: row
+            for row in Review.objects.filter(
+                business_id__in=missing,
+                is_approved=True
+            ).order_by().values('business_id').annotate(
+                avg_rating=Avg('rating'),
+                count=Count('id')
+            )
+        }
+        fresh = {}
+        for business_id in missing:
+            row = rows.get(business_id)
+            ratings[business_id] = fresh[keys[business_id]] = {
+                'avg_rating': row['avg_rating'] if row else None,
+                'count': row['count'] if row else 0,
+            }
+        cache.set_many(fresh, RATING_CACHE_TTL)
+
+    return ratings
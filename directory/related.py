@@ -0,0 +1,240 @@
+"""
+Offline related-business recommendations.
+
+Every active business is scored against every other one on category match,
+geographic proximity, rating and TF-IDF similarity of its description and
+services. Scores are computed with NumPy a batch of rows at a time, text
+similarity from sparse TF-IDF postings, and the top RELATED_K per business
+are stored in RelatedBusiness, so the detail page only reads a few primary
+keys. A nightly run rebuilds the table batch by batch and a frequent
+incremental run scores only the businesses edited since their rows were
+computed against the corpus.
+"""
+import math
+import re
+from collections import Counter
+
+import numpy as np
+from django.db import transaction
+from django.db.models import F, FloatField, Max, Q
+from django.db.models.functions import Cast
+
+from .cache_utils import RELATED_TAG, business_tag, invalidate_tags
+from .geo import EARTH_RADIUS_KM
+from .models import Business, RelatedBusiness, Service
+
+RELATED_K = 6
+BATCH_SIZE = 256
+MAX_FEATURES = 2048   # vocabulary cap
+GEO_SCALE_KM = 10     # proximity score falls to 1/e at this distance
+RATING_PRIOR = 3      # reviews needed before a rating counts for half its weight
+
+WEIGHTS = {
+    'category': 0.4,
+    'text': 0.3,
+    'geo': 0.2,
+    'rating': 0.1,
+}
+
+TOKEN_PATTERN = re.compile(r'[a-z0-9]{3,}')
+STOP_WORDS = frozenset(
+    'and are for from has have our the their this that with you your all any can '
+    'more also its not but was were will into over best services service'.split()
+)
+
+
+def _tokens(text):
+    return [token for token in TOKEN_PATTERN.findall(text.lower()) if token not in STOP_WORDS]
+
+def _tfidf(documents):
+    """
+    L2-normalized tf-idf rows with sublinear tf, as CSR arrays
+    (indptr, term columns, weights), and the vocabulary size
+    """
+    counts = [Counter(_tokens(document)) for document in documents]
+    document_frequency = Counter()
+    for terms in counts:
+        document_frequency.update(terms.keys())
+
+    # Terms in a single document can't make two documents similar
+    vocabulary = [term for term, df in document_frequency.most_common(MAX_FEATURES) if df > 1]
+    columns = {term: column for column, term in enumerate(vocabulary)}
+
+    total = len(documents)
+    idf = {term: math.log((1 + total) / (1 + document_frequency[term])) + 1 for term in vocabulary}
+    indptr, term_columns, weights = [0], [], []
+    for terms in counts:
+        row = [(columns[term], (1 + math.log(count)) * idf[term]) for term, count in terms.items() if term in columns]
+        norm = math.sqrt(sum(weight * weight for _, weight in row))
+        for column, weight in row:
+            term_columns.append(column)
+            weights.append(weight / norm)
+        indptr.append(len(term_columns))
+
+    return (
+        np.array(indptr, dtype=np.int64),
+        np.array(term_columns, dtype=np.int64),
+        np.array(weights, dtype=np.float64),
+        len(vocabulary),
+    )
+
+
+class Corpus:
+    """Feature arrays of every active business, row-aligned with ids"""
+
+    def __init__(self):
+        rows = list(
+            Business.objects.filter(is_active=True).annotate(
+                lat=Cast('latitude', FloatField()),
+                lng=Cast('longitude', FloatField()),
+            ).order_by('pk').values_list(
+                'pk', 'category_id', 'lat', 'lng', 'avg_rating', 'approved_review_count', 'description'
+            )
+        )
+        self.ids = np.array([row[0] for row in rows], dtype=np.int64)
+        self.positions = {business_id: position for position, business_id in enumerate(self.ids.tolist())}
+        self.categories = np.array([row[1] for row in rows], dtype=np.int64)
+
+        lats = np.array([np.nan if row[2] is None else row[2] for row in rows], dtype=np.float64)
+        lngs = np.array([np.nan if row[3] is None else row[3] for row in rows], dtype=np.float64)
+        self.has_geo = ~(np.isnan(lats) | np.isnan(lngs))
+        self.lat_rad = np.radians(np.nan_to_num(lats))
+        self.lng_rad = np.radians(np.nan_to_num(lngs))
+        self.cos_lat = np.cos(self.lat_rad)
+
+        # Rating in [0, 1], shrunk towards 0 for businesses with few reviews
+        ratings = np.array([row[4] or 0 for row in rows], dtype=np.float64)
+        review_counts = np.array([row[5] for row in rows], dtype=np.float64)
+        self.rating = (ratings / 5) * (review_counts / (review_counts + RATING_PRIOR))
+
+        services = {}
+        for business_id, name, description in Service.objects.filter(
+            business__is_active=True
+        ).values_list('business_id', 'name', 'description').iterator():
+            services.setdefault(business_id, []).append(f'{name} {description}')
+        self.text_indptr, self.text_terms, self.text_weights, vocabulary_size = _tfidf([
+            ' '.join([row[6] or ''] + services.get(row[0], [])) for row in rows
+        ])
+        # The same entries grouped by term: the postings of each term
+        entry_rows = np.repeat(np.arange(len(rows), dtype=np.int64), np.diff(self.text_indptr))
+        order = np.argsort(self.text_terms, kind='stable')
+        self.posting_rows = entry_rows[order]
+        self.posting_weights = self.text_weights[order]
+        self.posting_indptr = np.concatenate((
+            [0], np.cumsum(np.bincount(self.text_terms, minlength=vocabulary_size))
+        )).astype(np.int64)
+
+    def __len__(self):
+        return len(self.ids)
+
+    def _proximity(self, rows):
+        dlat = self.lat_rad[None, :] - self.lat_rad[rows, None]
+        dlng = self.lng_rad[None, :] - self.lng_rad[rows, None]
+        a = np.sin(dlat / 2) ** 2 + self.cos_lat[rows, None] * self.cos_lat[None, :] * np.sin(dlng / 2) ** 2
+        distance = 2 * EARTH_RADIUS_KM * np.arcsin(np.sqrt(np.minimum(a, 1.0)))
+        both_located = self.has_geo[rows, None] & self.has_geo[None, :]
+        return np.where(both_located, np.exp(-distance / GEO_SCALE_KM), 0.0)
+
+    def _text_similarity(self, rows):
+        """(len(rows) x corpus) cosine similarity, accumulated over the postings of the rows' terms"""
+        similarity = np.zeros((len(rows), len(self)))
+        starts, ends = self.text_indptr[rows], self.text_indptr[rows + 1]
+        if not (ends - starts).any():
+            return similarity
+        entries = np.concatenate([np.arange(start, end) for start, end in zip(starts, ends)])
+        batch_rows = np.repeat(np.arange(len(rows)), ends - starts)
+        order = np.argsort(self.text_terms[entries], kind='stable')
+        entries, batch_rows = entries[order], batch_rows[order]
+        terms = self.text_terms[entries]
+
+        # One outer product per distinct term of the batch
+        for group in np.split(np.arange(len(terms)), np.flatnonzero(np.diff(terms)) + 1):
+            term = terms[group[0]]
+            postings = slice(self.posting_indptr[term], self.posting_indptr[term + 1])
+            similarity[np.ix_(batch_rows[group], self.posting_rows[postings])] += np.outer(
+                self.text_weights[entries[group]], self.posting_weights[postings]
+            )
+        return similarity
+
+    def scores(self, rows):
+        """(len(rows) x corpus) combined scores, with each row's own column at -inf"""
+        rows = np.asarray(rows, dtype=np.int64)
+        scores = WEIGHTS['text'] * self._text_similarity(rows)
+        scores += WEIGHTS['category'] * (self.categories[rows, None] == self.categories[None, :])
+        scores += WEIGHTS['geo'] * self._proximity(rows)
+        scores += WEIGHTS['rating'] * self.rating[None, :]
+        scores[np.arange(len(rows)), rows] = -np.inf
+        return scores
+
+    def top_related(self, rows, k=RELATED_K):
+        """[(business_id, [(related_id, score), ...]), ...] for the given corpus rows"""
+        k = min(k, len(self) - 1)
+        if k <= 0:
+            return [(int(self.ids[row]), []) for row in rows]
+
+        scores = self.scores(rows)
+        best = np.argpartition(-scores, k - 1, axis=1)[:, :k]
+        best_scores = np.take_along_axis(scores, best, axis=1)
+        order = np.argsort(-best_scores, axis=1, kind='stable')
+        best = np.take_along_axis(best, order, axis=1)
+        best_scores = np.take_along_axis(best_scores, order, axis=1)
+
+        return [
+            (int(self.ids[row]), [
+                (int(self.ids[column]), float(score)) for column, score in zip(columns, row_scores)
+            ])
+            for row, columns, row_scores in zip(rows, best, best_scores)
+        ]
+
+
+def _related_rows(corpus, rows, batch_size):
+    """(business_ids, RelatedBusiness instances) for the given corpus rows, a batch at a time"""
+    for start in range(0, len(rows), batch_size):
+        business_ids, entries = [], []
+        for business_id, related in corpus.top_related(rows[start:start + batch_size]):
+            business_ids.append(business_id)
+            for rank, (related_id, score) in enumerate(related, 1):
+                entries.append(RelatedBusiness(business_id=business_id, related_id=related_id, rank=rank, score=score))
+        yield business_ids, entries
+
+def _replace_rows(business_ids, entries):
+    with transaction.atomic():
+        RelatedBusiness.objects.filter(business_id__in=business_ids).delete()
+        RelatedBusiness.objects.bulk_create(entries)
+
+def rebuild_related_businesses(batch_size=BATCH_SIZE):
+    """Recompute the whole table a batch at a time; returns the number of businesses scored"""
+    corpus = Corpus()
+    # Each batch replaces its own rows, so only one batch is held in memory
+    # and pages keep their old rows until their batch is written
+    for batch_ids, batch in _related_rows(corpus, list(range(len(corpus))), batch_size):
+        _replace_rows(batch_ids, batch)
+    RelatedBusiness.objects.filter(business__is_active=False).delete()
+    invalidate_tags(RELATED_TAG)
+    return len(corpus)
+
+def stale_business_ids():
+    """Active businesses without rows or edited since their rows were computed"""
+    return list(
+        Business.objects.filter(is_active=True).annotate(
+            computed_at=Max('recommendations__computed_at')
+        ).filter(
+            Q(computed_at__isnull=True) | Q(updated_at__gt=F('computed_at'))
+        ).values_list('pk', flat=True)
+    )
+
+def refresh_related_businesses(business_ids=None, batch_size=BATCH_SIZE):
+    """Recompute the rows of the given (default: stale) businesses; returns how many were scored"""
+    if business_ids is None:
+        business_ids = stale_business_ids()
+    # Rows of businesses that have since gone inactive are dropped
+    RelatedBusiness.objects.filter(business__is_active=False).delete()
+    if not business_ids:
+        return 0
+
+    corpus = Corpus()
+    rows = [corpus.positions[business_id] for business_id in business_ids if business_id in corpus.positions]
+    for batch_ids, batch in _related_rows(corpus, rows, batch_size):
+        _replace_rows(batch_ids, batch)
+        invalidate_tags(*(business_tag(business_id) for business_id in batch_ids))
+    return len(rows)
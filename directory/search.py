@@ -0,0 +1,117 @@
+import re
+from django.contrib.postgres.search import SearchQuery, SearchRank
+from django.db import connection
+from django.db.models import Exists, F, FloatField, OuterRef, Q, Value
+from django.db.models.expressions import RawSQL
+from django.db.models.functions import Cast
+from .models import Service
+
+SEARCH_CONFIG = 'english'
+FTS_TABLE = 'directory_business_fts'
+
+# Name and service names weigh more than the free-text description
+PG_UPDATE_SQL = """
+    UPDATE directory_business b SET search_vector =
+        setweight(to_tsvector('english', coalesce(b.name, '')), 'A') ||
+        setweight(to_tsvector('english', coalesce((
+            SELECT string_agg(s.name, ' ') FROM directory_service s WHERE s.business_id = b.id
+        ), '')), 'B') ||
+        setweight(to_tsvector('english', coalesce(b.description, '')), 'C')
+    WHERE b.id = %s
+"""
+
+SQLITE_DELETE_SQL = f"DELETE FROM {FTS_TABLE} WHERE rowid = %s"
+SQLITE_INSERT_SQL = f"""
+    INSERT INTO {FTS_TABLE} (rowid, name, description, services)
+    SELECT b.id, b.name, b.description, coalesce((
+        SELECT group_concat(s.name, ' ') FROM directory_service s WHERE s.business_id = b.id
+    ), '')
+    FROM directory_business b WHERE b.id = %s
+"""
+
+_sqlite_fts_available = None
+
+def _search_terms(query):
+    """Split a user query into safe word tokens"""
+    return re.findall(r'\w+', query.lower())[:8]
+
+def _has_sqlite_fts():
+    global _sqlite_fts_available
+    if _sqlite_fts_available is None:
+        _sqlite_fts_available = FTS_TABLE in connection.introspection.table_names()
+    return _sqlite_fts_available
+
+def get_search_backend():
+    """Name of the full-text backend available on the current database"""
+    if connection.vendor == 'postgresql':
+        return 'postgresql'
+    if connection.vendor == 'sqlite' and _has_sqlite_fts():
+        return 'sqlite_fts'
+    return 'basic'
+
+def update_search_document(business_id):
+    """Rebuild the search document for one business from its current row and services"""
+    backend = get_search_backend()
+    with connection.cursor() as cursor:
+        if backend == 'postgresql':
+            cursor.execute(PG_UPDATE_SQL, [business_id])
+        elif backend == 'sqlite_fts':
+            cursor.execute(SQLITE_DELETE_SQL, [business_id])
+            cursor.execute(SQLITE_INSERT_SQL, [business_id])
+
+def delete_search_document(business_id):
+    """Drop a deleted business from the search index"""
+    if get_search_backend() == 'sqlite_fts':
+        with connection.cursor() as cursor:
+            cursor.execute(SQLITE_DELETE_SQL, [business_id])
+
+def search_businesses(queryset, query):
+    """
+    Filter a Business queryset by a free-text query.
+    
+    Every matched row gets a `search_rank` annotation (higher is better). Words
+    are matched as prefixes so partially typed terms still hit, and services
+    are matched without joining, so no DISTINCT is needed.
+    """
+    terms = _search_terms(query)
+    if not terms:
+        # Still annotated, callers order by search_rank
+        return queryset.none().annotate(search_rank=Value(0.0, output_field=FloatField()))
+
+    backend = get_search_backend()
+    if backend == 'postgresql':
+        search_query = SearchQuery(
+            ' & '.join(f'{term}:*' for term in terms),
+            config=SEARCH_CONFIG,
+            search_type='raw'
+        )
+        return queryset.filter(search_vector=search_query).annotate(
+            # ts_rank is float4; as float8 it compares equal to the value a cursor carries
+            search_rank=Cast(SearchRank(F('search_vector'), search_query), FloatField())
+        )
+
+    if backend == 'sqlite_fts':
+        match = ' '.join(f'"{term}"*' for term in terms)
+        return queryset.filter(
+            pk__in=RawSQL(f"SELECT rowid FROM {FTS_TABLE} WHERE {FTS_TABLE} MATCH %s", [match])
+        ).annotate(
+            # bm25() is lower-is-better, flip it to match SearchRank
+            search_rank=RawSQL(
+                f"SELECT -bm25({FTS_TABLE}) FROM {FTS_TABLE} "
+                f"WHERE {FTS_TABLE} MATCH %s AND rowid = directory_business.id",
+                [match],
+                output_field=FloatField()
+            )
+        )
+
+    # Other databases: substring match, with services checked through EXISTS
+    term_filter = Q()
+    for term in terms:
+        term_filter &= (
+            Q(name__icontains=term) |
+            Q(description__icontains=term) |
+            Exists(Service.objects.filter(business=OuterRef('pk'), name__icontains=term))
+        )
+    return queryset.filter(term_filter).annotate(
+        search_rank=Value(0.0, output_field=FloatField())
+    )
@@ -1,12 +1,29 @@
-from django.db.models.signals import post_save
+from django.db.models.signals import pre_save, post_save, post_delete
 from django.dispatch import receiver
+from django.contrib.auth.models import User
 from django.conf import settings
-from django.core.mail import send_mail
+from django.core.mail import send_mail, get_connection, EmailMultiAlternatives
 from celery import shared_task
 from django.template.loader import render_to_string
 from django.utils.html import strip_tags
-from .models import Business, Enquiry, CouponRequest, Review
+from .models import Business, BusinessHours, BusinessImage, Category, Enquiry, CouponRequest, Review, Service, UserSubscription
+from .ratings import apply_rating_delta
+from .facets import invalidate_listing_facets
+from .listing_query import invalidate_listing_results
+from .search import update_search_document, delete_search_document
+from .autocomplete import autocomplete_index
+from .nearby import nearby_engine
+from .localities import business_localities, localities_for, apply_locality_delta
+from .pincodes import pincode_index
+from .images import refresh_primary_image
+from .premium import refresh_premium, expire_subscriptions
+from .related import rebuild_related_businesses, refresh_related_businesses
+from .cache_utils import business_tag, category_tag, invalidate_tags
+from .hours import refresh_weekly_hours
+from .catalogue import invalidate_category_catalogue
+from .homepage import refresh_homepage_payload
 import logging
+import time
 import uuid
 
 logger = logging.getLogger(__name__)
@@ -147,6 +164,304 @@ def review_approval_notification(sender, instance, created, **kwargs):
     if not created and instance.is_approved:
         send_review_visible_email.delay(instance.id)
 
+# Keep the denormalized rating aggregates on Business in step with reviews
+@receiver(pre_save, sender=Review)
+def review_rating_snapshot(sender, instance, raw=False, **kwargs):
+    # Remember what this review contributed before the save
+    instance._rating_snapshot = None
+    if instance.pk and not raw:
+        instance._rating_snapshot = Review.objects.filter(pk=instance.pk).values(
+            'business_id', 'rating', 'is_approved'
+        ).first()
+
+@receiver(post_save, sender=Review)
+def review_rating_aggregates(sender, instance, created, raw=False, **kwargs):
+    if raw:
+        return
+    previous = getattr(instance, '_rating_snapshot', None)
+    deltas = {}
+    if previous and previous['is_approved']:
+        business_id = previous['business_id']
+        rating_sum, count = deltas.get(business_id, (0, 0))
+        deltas[business_id] = (rating_sum - previous['rating'], count - 1)
+    if instance.is_approved:
+        rating_sum, count = deltas.get(instance.business_id, (0, 0))
+        deltas[instance.business_id] = (rating_sum + int(instance.rating), count + 1)
+    for business_id, (rating_sum, count) in deltas.items():
+        apply_rating_delta(business_id, rating_sum, count)
+    if deltas:
+        invalidate_listing_facets()
+        invalidate_listing_results()
+
+@receiver(post_delete, sender=Review)
+def review_deleted_aggregates(sender, instance, **kwargs):
+    if instance.is_approved:
+        apply_rating_delta(instance.business_id, -int(instance.rating), -1)
+        invalidate_listing_facets()
+        invalidate_listing_results()
+
+# Category, status and verification changes all move the sidebar facets
+# and the cached listing results
+@receiver(post_save, sender=Business)
+@receiver(post_delete, sender=Business)
+def business_facets_changed(sender, instance, **kwargs):
+    invalidate_listing_facets()
+    invalidate_listing_results()
+
+# Keep the full-text search document in step with name, description and services
+@receiver(post_save, sender=Business)
+def business_search_document(sender, instance, raw=False, **kwargs):
+    if not raw:
+        update_search_document(instance.id)
+
+@receiver(post_delete, sender=Business)
+def business_search_document_deleted(sender, instance, **kwargs):
+    delete_search_document(instance.id)
+
+@receiver(post_save, sender=Service)
+@receiver(post_delete, sender=Service)
+def service_search_document(sender, instance, raw=False, **kwargs):
+    if not raw:
+        update_search_document(instance.business_id)
+        invalidate_listing_results()
+
+def _snapshot_changed(instance, *fields):
+    """Whether a saved Business is new or differs from its pre_save snapshot in `fields`"""
+    snapshot = getattr(instance, '_snapshot', None)
+    return snapshot is None or any(snapshot[field] != getattr(instance, field) for field in fields)
+
+# Keep the in-process autocomplete index current; a business entry only
+# moves with its name, status or category
+@receiver(post_save, sender=Business)
+def business_autocomplete(sender, instance, raw=False, **kwargs):
+    if raw:
+        return
+    if _snapshot_changed(instance, 'name', 'category_id', 'is_active'):
+        autocomplete_index.business_changed(instance.id)
+
+@receiver(post_delete, sender=Business)
+def business_autocomplete_deleted(sender, instance, **kwargs):
+    autocomplete_index.business_changed(instance.id)
+
+@receiver(post_save, sender=Service)
+@receiver(post_delete, sender=Service)
+def service_autocomplete(sender, instance, raw=False, **kwargs):
+    if not raw:
+        autocomplete_index.business_changed(instance.business_id)
+
+@receiver(post_save, sender=Category)
+@receiver(post_delete, sender=Category)
+def category_autocomplete(sender, instance, raw=False, **kwargs):
+    if not raw:
+        autocomplete_index.category_changed(instance.id)
+
+# Feed coordinate, status and category changes to the nearby engine
+@receiver(post_save, sender=Business)
+def business_nearby(sender, instance, raw=False, update_fields=None, **kwargs):
+    if raw:
+        return
+    if update_fields is not None and not {'latitude', 'longitude', 'is_active', 'category', 'category_id'} & set(update_fields):
+        return
+    nearby_engine.business_changed(instance)
+
+@receiver(post_delete, sender=Business)
+def business_nearby_deleted(sender, instance, **kwargs):
+    nearby_engine.business_changed(instance, deleted=True)
+
+# One SELECT of the stored row before a Business save, shared by the
+# autocomplete, locality and category catalogue receivers
+@receiver(pre_save, sender=Business)
+def business_snapshot(sender, instance, raw=False, **kwargs):
+    instance._snapshot = None
+    if instance.pk and not raw:
+        instance._snapshot = Business.objects.filter(pk=instance.pk).values(
+            'name', 'category_id', 'is_active', 'city', 'state', 'address', 'pincode'
+        ).first()
+
+# Keep the locality gazetteer counts in step with business addresses
+@receiver(post_save, sender=Business)
+def business_localities_changed(sender, instance, raw=False, **kwargs):
+    if raw:
+        return
+    snapshot = getattr(instance, '_snapshot', None)
+    previous = set()
+    if snapshot and snapshot['is_active']:
+        previous = business_localities(
+            snapshot['city'], snapshot['state'], snapshot['address'], snapshot['pincode']
+        )
+    current = localities_for(instance)
+    apply_locality_delta(previous - current, -1)
+    apply_locality_delta(current - previous, 1)
+
+@receiver(post_delete, sender=Business)
+def business_localities_deleted(sender, instance, **kwargs):
+    apply_locality_delta(localities_for(instance), -1)
+
+@receiver(post_save, sender=Business)
+def business_pincode_index(sender, instance, raw=False, update_fields=None, **kwargs):
+    if raw:
+        return
+    if update_fields is not None and not {'pincode', 'is_active'} & set(update_fields):
+        return
+    pincode_index.invalidate()
+
+@receiver(post_delete, sender=Business)
+def business_pincode_index_deleted(sender, instance, **kwargs):
+    pincode_index.invalidate()
+
+# Keep the stored primary image URLs in step with BusinessImage rows
+@receiver(post_save, sender=BusinessImage)
+@receiver(post_delete, sender=BusinessImage)
+def business_image_changed(sender, instance, raw=False, **kwargs):
+    if not raw:
+        refresh_primary_image(instance.business_id)
+
+# Keep the materialized premium flag in step with subscriptions
+@receiver(pre_save, sender=UserSubscription)
+def subscription_business_snapshot(sender, instance, raw=False, **kwargs):
+    instance._previous_business_id = None
+    if instance.pk and not raw:
+        instance._previous_business_id = UserSubscription.objects.filter(
+            pk=instance.pk
+        ).values_list('business_id', flat=True).first()
+
+@receiver(post_save, sender=UserSubscription)
+@receiver(post_delete, sender=UserSubscription)
+def subscription_premium_changed(sender, instance, raw=False, **kwargs):
+    if raw:
+        return
+    previous = getattr(instance, '_previous_business_id', None)
+    if previous and previous != instance.business_id:
+        refresh_premium(previous)
+    refresh_premium(instance.business_id)
+
+@shared_task
+def send_subscription_expired_emails(subscription_ids):
+    """Notify owners of lapsed subscriptions over a single mail connection"""
+    subscriptions = UserSubscription.objects.filter(
+        pk__in=subscription_ids
+    ).select_related('user', 'plan', 'business')
+
+    emails = []
+    for subscription in subscriptions.iterator(chunk_size=500):
+        owner = subscription.user
+        if not owner.email:
+            continue
+        context = {
+            'subscription': subscription,
+            'business': subscription.business,
+            'owner_name': owner.get_full_name() or owner.username
+        }
+        subject = f"Your {subscription.plan.name} subscription has expired"
+        html_message = render_to_string('emails/subscription_expired.html', context)
+        email = EmailMultiAlternatives(subject, strip_tags(html_message), settings.DEFAULT_FROM_EMAIL, [owner.email])
+        email.attach_alternative(html_message, 'text/html')
+        emails.append(email)
+
+    if emails:
+        with get_connection() as connection:
+            connection.send_messages(emails)
+    return len(emails)
+
+@shared_task
+def sweep_expired_subscriptions(chunk_size=500):
+    """Expire lapsed subscriptions in bulk and queue the owner emails as one job"""
+    started = time.monotonic()
+    expired, cleared, lapsed_ids = expire_subscriptions(chunk_size)
+    if lapsed_ids:
+        send_subscription_expired_emails.delay(lapsed_ids)
+
+    report = {
+        'subscriptions_expired': expired,
+        'premium_cleared': cleared,
+        'owners_notified': len(lapsed_ids),
+        'duration': round(time.monotonic() - started, 3),
+    }
+    logger.info(f"Subscription expiry sweep: {report}")
+    return report
+
+# Category page counts only move when a business changes category or status
+@receiver(post_save, sender=Business)
+def business_catalogue_changed(sender, instance, raw=False, **kwargs):
+    if raw:
+        return
+    if _snapshot_changed(instance, 'category_id', 'is_active'):
+        invalidate_category_catalogue()
+
+@receiver(post_delete, sender=Business)
+@receiver(post_save, sender=Category)
+@receiver(post_delete, sender=Category)
+def category_catalogue_changed(sender, instance, raw=False, **kwargs):
+    if not raw:
+        invalidate_category_catalogue()
+
+# Keep the weekly hours bitmap in step with BusinessHours rows
+@receiver(post_save, sender=BusinessHours)
+@receiver(post_delete, sender=BusinessHours)
+def business_hours_changed(sender, instance, raw=False, **kwargs):
+    if not raw:
+        refresh_weekly_hours(instance.business_id)
+
+# Cache tags: entries built from a business (its detail page, rating, card)
+# or a category are dropped when anything shown in them changes
+@receiver(post_save, sender=Business)
+@receiver(post_delete, sender=Business)
+def business_tag_changed(sender, instance, raw=False, **kwargs):
+    if not raw:
+        invalidate_tags(business_tag(instance.pk))
+
+@receiver(post_save, sender=Review)
+@receiver(post_delete, sender=Review)
+@receiver(post_save, sender=BusinessImage)
+@receiver(post_delete, sender=BusinessImage)
+@receiver(post_save, sender=BusinessHours)
+@receiver(post_delete, sender=BusinessHours)
+@receiver(post_save, sender=Service)
+@receiver(post_delete, sender=Service)
+@receiver(post_save, sender=UserSubscription)
+@receiver(post_delete, sender=UserSubscription)
+def business_content_changed(sender, instance, raw=False, **kwargs):
+    if not raw and instance.business_id:
+        invalidate_tags(business_tag(instance.business_id))
+
+# Pages and cards show the owner's name; last_login saves on sign-in are skipped
+@receiver(post_save, sender=User)
+def owner_tag_changed(sender, instance, raw=False, update_fields=None, **kwargs):
+    if raw:
+        return
+    if update_fields is not None and not {'username', 'first_name', 'last_name'} & set(update_fields):
+        return
+    business_ids = Business.objects.filter(owner_id=instance.pk).values_list('pk', flat=True)
+    invalidate_tags(*(business_tag(business_id) for business_id in business_ids))
+
+@receiver(post_save, sender=Category)
+@receiver(post_delete, sender=Category)
+def category_tag_changed(sender, instance, raw=False, **kwargs):
+    if not raw:
+        invalidate_tags(category_tag(instance.pk))
+
+# Related-business recommendations, run by Celery beat. config/celery.py
+# caps tasks at 60s/120s for the email tasks; these scan every business
+@shared_task(soft_time_limit=50 * 60, time_limit=55 * 60)
+def rebuild_related_businesses_task():
+    started = time.monotonic()
+    total = rebuild_related_businesses()
+    logger.info(f"Rebuilt related businesses for {total} listings in {time.monotonic() - started:.2f}s")
+    return total
+
+@shared_task(soft_time_limit=10 * 60, time_limit=12 * 60)
+def refresh_related_businesses_task():
+    started = time.monotonic()
+    total = refresh_related_businesses()
+    logger.info(f"Refreshed related businesses for {total} listings in {time.monotonic() - started:.2f}s")
+    return total
+
+# Home page data set, rebuilt by Celery beat
+@shared_task
+def refresh_homepage_payload_task():
+    payload = refresh_homepage_payload()
+    return len(payload['featured_businesses'])
+
 # Add tasks and receiver for Business status change notifications
 @shared_task
 def send_business_live_email(business_id):
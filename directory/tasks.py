@@ -14,6 +14,11 @@ from .signals import (
     send_coupon_settings_updated_email,
     send_coupon_enabled_email,
     send_coupon_disabled_email,
+    send_subscription_expired_emails,
+    sweep_expired_subscriptions,
+    rebuild_related_businesses_task,
+    refresh_related_businesses_task,
+    refresh_homepage_payload_task,
 )
 
 # Import welcome email task from accounts to ensure Celery registers it
@@ -0,0 +1,212 @@
+import threading
+import time
+from datetime import datetime, timedelta, timezone as dt_timezone
+from unittest import mock
+import fakeredis
+from django.contrib.auth.models import User
+from django.core.cache import cache
+from django.test import SimpleTestCase, TestCase, override_settings
+from . import cache_utils, listing_query
+from .cache_utils import (
+    bump_cache_version, cached, get_cache_version, invalidate_tags, local_cache, tiered_get, tiered_set,
+)
+from .listing_query import ListingQuery
+from .models import Business, Category
+from .pagination import decode_cursor, encode_cursor
+
+
+def redis_caches(location, **options):
+    """CACHES with django-redis on `location` and the usual in-process tier"""
+    return {
+        'default': {
+            'BACKEND': 'django_redis.cache.RedisCache',
+            'LOCATION': location,
+            'KEY_PREFIX': 'bizdirectory-test',
+            'OPTIONS': {
+                'CLIENT_CLASS': 'django_redis.client.DefaultClient',
+                'IGNORE_EXCEPTIONS': True,
+                **options,
+            },
+        },
+        'local': {
+            'BACKEND': 'django.core.cache.backends.locmem.LocMemCache',
+            'LOCATION': 'bizdirectory-test-local',
+        },
+    }
+
+# fakeredis stands in for the Redis server; incr() needs lupa for its Lua scripts
+FAKE_REDIS_CACHES = redis_caches(
+    'redis://fake-redis:6379/0',
+    CONNECTION_POOL_KWARGS={'connection_class': fakeredis.FakeConnection},
+)
+# Nothing listens on port 1, so every command fails like during an outage
+UNREACHABLE_REDIS_CACHES = redis_caches(
+    'redis://127.0.0.1:1/0', SOCKET_CONNECT_TIMEOUT=0.5, SOCKET_TIMEOUT=0.5,
+)
+
+
+@override_settings(CACHES=FAKE_REDIS_CACHES)
+class TieredCacheTests(SimpleTestCase):
+    def setUp(self):
+        cache.clear()
+        local_cache.clear()
+
+    def test_set_fills_both_tiers(self):
+        tiered_set('tiered:key', 'value', 60)
+        self.assertEqual(cache.get('tiered:key'), 'value')
+        self.assertEqual(local_cache.get('tiered:key'), 'value')
+
+    def test_get_falls_back_to_shared_cache_and_fills_local_tier(self):
+        cache.set('tiered:key', 'shared', 60)
+        self.assertEqual(tiered_get('tiered:key'), 'shared')
+        self.assertEqual(local_cache.get('tiered:key'), 'shared')
+
+    def test_local_tier_answers_without_shared_cache(self):
+        tiered_set('tiered:key', 'value', 60)
+        cache.delete('tiered:key')
+        self.assertEqual(tiered_get('tiered:key'), 'value')
+
+    def test_miss_returns_none(self):
+        self.assertIsNone(tiered_get('tiered:missing'))
+
+
+@override_settings(CACHES=FAKE_REDIS_CACHES)
+class CacheVersionTests(SimpleTestCase):
+    def setUp(self):
+        cache.clear()
+        local_cache.clear()
+
+    def test_version_is_stable_between_reads(self):
+        version = get_cache_version('family')
+        time.sleep(0.01)
+        self.assertEqual(get_cache_version('family'), version)
+
+    def test_bump_increments_version(self):
+        version = get_cache_version('family')
+        self.assertEqual(bump_cache_version('family'), version + 1)
+        self.assertEqual(get_cache_version('family'), version + 1)
+
+    def test_bump_without_stamp_seeds_one(self):
+        version = bump_cache_version('family')
+        self.assertEqual(get_cache_version('family'), version)
+
+    def test_bumping_a_tag_invalidates_its_entries(self):
+        builds = []
+        def build():
+            builds.append(1)
+            return len(builds)
+
+        self.assertEqual(cached('tagged', 60, build, tags=['family']), 1)
+        self.assertEqual(cached('tagged', 60, build, tags=['family']), 1)
+        invalidate_tags('family')
+        self.assertEqual(cached('tagged', 60, build, tags=['family']), 2)
+
+
+@override_settings(CACHES=FAKE_REDIS_CACHES)
+class CachedBuildLockTests(SimpleTestCase):
+    def setUp(self):
+        cache.clear()
+        local_cache.clear()
+
+    def call_concurrently(self, count, function):
+        results = []
+        threads = [threading.Thread(target=lambda: results.append(function())) for _ in range(count)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        return results
+
+    def test_concurrent_callers_build_once(self):
+        builds = []
+        def build():
+            builds.append(1)
+            time.sleep(0.5)
+            return 'built'
+
+        results = self.call_concurrently(8, lambda: cached('concurrent', 60, build))
+        self.assertEqual(results, ['built'] * 8)
+        self.assertEqual(len(builds), 1)
+
+    def test_waiters_take_over_a_released_lock(self):
+        # A holder that gives up without storing a value leaves the build
+        # to exactly one of the waiters
+        builds = []
+        def build():
+            builds.append(1)
+            time.sleep(0.2)
+            return 'built'
+
+        cache.add('released:lock', 1, 60)
+        timer = threading.Timer(0.3, cache.delete, ['released:lock'])
+        timer.start()
+        results = self.call_concurrently(4, lambda: cached('released', 60, build))
+        timer.join()
+        self.assertEqual(results, ['built'] * 4)
+        self.assertEqual(len(builds), 1)
+
+
+@override_settings(CACHES=UNREACHABLE_REDIS_CACHES)
+class CacheOutageTests(SimpleTestCase):
+    def setUp(self):
+        local_cache.clear()
+        cache_utils._outage_versions.clear()
+
+    def test_version_is_stable_during_outage(self):
+        version = get_cache_version('family')
+        time.sleep(0.01)
+        self.assertEqual(get_cache_version('family'), version)
+        self.assertEqual(bump_cache_version('family'), version + 1)
+        self.assertEqual(get_cache_version('family'), version + 1)
+
+    def test_cached_builds_without_waiting_for_a_lock(self):
+        started = time.monotonic()
+        self.assertEqual(cached('outage', 60, lambda: 'built'), 'built')
+        self.assertLess(time.monotonic() - started, 1.0)
+
+
+@override_settings(CACHES=FAKE_REDIS_CACHES)
+class CursorPaginationTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        owner = User.objects.create(username='owner')
+        category = Category.objects.create(name='Plumbers', slug='plumbers')
+        # bulk_create keeps the save signals out of it
+        businesses = Business.objects.bulk_create([
+            Business(
+                owner=owner, category=category, name=f'Business {number}', description='',
+                address='', pincode='560001', phone='', email='', registration_number='', is_active=True,
+            )
+            for number in range(8)
+        ])
+        # All created within one millisecond, 100 microseconds apart
+        created_at = datetime(2026, 1, 1, 12, 0, 0, 10000, tzinfo=dt_timezone.utc)
+        for offset, business in enumerate(businesses):
+            Business.objects.filter(pk=business.pk).update(created_at=created_at + timedelta(microseconds=100 * offset))
+        cls.expected = [business.pk for business in reversed(businesses)]
+
+    def setUp(self):
+        cache.clear()
+        local_cache.clear()
+
+    def walk(self, listing, size):
+        ids, cursor = [], None
+        while True:
+            rows, has_next = listing.after(cursor, size)
+            ids.extend(row[-1] for row in rows)
+            if not has_next:
+                return ids
+            cursor = encode_cursor(rows[-1])
+
+    def test_cursor_keeps_microseconds(self):
+        listing = ListingQuery.from_params({})
+        row = listing.results()[0:1][0]
+        self.assertEqual(decode_cursor(encode_cursor(row), listing.ordering), list(row))
+
+    def test_pages_inside_cached_prefix(self):
+        self.assertEqual(self.walk(ListingQuery.from_params({}), 3), self.expected)
+
+    def test_pages_past_cached_prefix(self):
+        # Cursor rows beyond the prefix are continued with after_filter in SQL
+        with mock.patch.object(listing_query, 'MAX_CACHED_ROWS', 2):
+            self.assertEqual(self.walk(ListingQuery.from_params({}), 3), self.expected)
@@ -1,6 +1,5 @@
 from django.shortcuts import render, get_object_or_404
 from django.urls import reverse  # Add this line
-from django.db.models import Q, Avg, Count
 from django.http import JsonResponse, Http404
 from django.core.paginator import Paginator
 from django.utils import timezone
@@ -8,15 +7,33 @@ from django.contrib import messages
 from django.contrib.auth.decorators import login_required
 from django.shortcuts import redirect
 from django.contrib.admin.views.decorators import staff_member_required
+from django.views.decorators.cache import cache_control
+from django.views.decorators.http import condition
 import redis
 from django.conf import settings
 from .forms import BusinessForm
+from .facets import get_listing_facets
+from .autocomplete import get_suggestions
+from .nearby import nearby_engine, hydrate_hits
+from .geo import clean_coordinates, clean_radius
+from .localities import locality_suggestions
+from .pincodes import pincode_index
+from .pagination import encode_cursor
+from .listing_query import ListingQuery
+from .cards import cards_response
+from .card_cache import business_cards
+from .conditional import (
+    SUGGESTIONS_MAX_AGE, LISTINGS_MAX_AGE, listings_ajax_page, business_detail_etag, listings_ajax_etag,
+    search_suggestions_etag, category_suggestions_etag, location_suggestions_etag, pincode_suggestions_etag,
+)
+from .premium import premium_businesses
+from .page_cache import is_cacheable, cached_page, store_page
+from .catalogue import get_category_catalogue, catalogue_categories
+from .homepage import get_homepage_payload
 from datetime import timedelta
 import os
 import logging
 import math
-from django.db.models import F, FloatField, ExpressionWrapper
-from django.db.models.functions import Sin, Cos, Radians, Power, Sqrt, ATan2
 
 # Fix missing imports
 from .models import Business, Category, Service, BusinessImage, BusinessHours, Review, Enquiry, CouponRequest, SubscriptionPlan, UserSubscription
@@ -28,37 +45,16 @@ def home(request):
     selected_category = request.GET.get('category', '')
     selected_pincode = request.GET.get('pincode', '')
     
-    businesses = Business.objects.filter(is_active=True).prefetch_related('services')
-    
-    # Add this filter to only include approved reviews
-    businesses = businesses.annotate(
-        avg_rating=Avg('reviews__rating', filter=Q(reviews__is_approved=True)),
-        approved_reviews_count=Count('reviews', filter=Q(reviews__is_approved=True))
-    )
-    
-    if search_query:
-        businesses = businesses.filter(
-            Q(name__icontains=search_query) |
-            Q(description__icontains=search_query)
-        )
-    
-    if selected_category:
-        businesses = businesses.filter(category_id=selected_category)
-    
-    if selected_pincode:
-        businesses = businesses.filter(pincode=selected_pincode)
-    
-    categories = Category.objects.all()
-    
-    # Get top categories with business counts
-    top_categories = Category.objects.annotate(
-        business_count=Count('business', filter=Q(business__is_active=True))
-    ).order_by('-business_count')
+    # Categories, featured businesses and counts come precomputed from one
+    # cache blob refreshed by Celery beat (directory.homepage)
+    payload = get_homepage_payload()
     
     context = {
-        'categories': categories,
-        'top_categories': top_categories,
-        'businesses': businesses[:10],  # Limit to 10 for homepage
+        'categories': payload['categories'],
+        'top_categories': payload['top_categories'],
+        'featured_businesses': payload['featured_businesses'],
+        'total_businesses': payload['total_businesses'],
+        'total_categories': payload['total_categories'],
         'search_query': search_query,
         'selected_category': selected_category,
         'selected_pincode': selected_pincode,
@@ -67,8 +63,15 @@ def home(request):
     
     return render(request, 'directory/home.html', context)
 
+@condition(etag_func=business_detail_etag)
 def business_detail(request, pk):
     """View for displaying a single business listing"""
+    # Anonymous visitors share one cached copy of the page
+    cacheable = is_cacheable(request)
+    if cacheable:
+        response = cached_page(request, pk)
+        if response is not None:
+            return response
 
         # ✅ UPDATED: Handle inactive businesses based on user permissions
     if request.user.is_staff:
@@ -85,22 +88,12 @@ def business_detail(request, pk):
         business = get_object_or_404(Business, pk=pk)
         
     
-    # Get today's weekday (0=Monday, 6=Sunday)
-    today_weekday = timezone.now().weekday()
+    # Today's weekday in the 1-7 range of BusinessHours.DAYS_OF_WEEK
+    today_weekday_adjusted = timezone.localdate().isoweekday()
     
-    # Convert to 1-7 range to match our model's DAYS_OF_WEEK values
-    today_weekday_adjusted = today_weekday + 1
-    
-    # Get today's hours using ONLY the adjusted value
-    today_hours = business.hours.filter(day=today_weekday_adjusted).first()
-    
-    # Calculate average rating from approved reviews
-    business.avg_rating = business.reviews.filter(is_approved=True).aggregate(
-        avg=Avg('rating')
-    )['avg'] or 0
-    
-    # Count only approved reviews
-    business.approved_reviews_count = business.reviews.filter(is_approved=True).count()
+    # The stored rows in one query; the weekly bitmap is only used for filtering
+    business_hours = list(business.hours.order_by('day'))
+    today_hours = next((hours for hours in business_hours if hours.day == today_weekday_adjusted), None)
     
     # Check if visitor has already submitted a review
     user_review = None
@@ -108,58 +101,47 @@ def business_detail(request, pk):
     if reviewer_email:
         user_review = business.reviews.filter(email=reviewer_email).first()
     
-    # Get related businesses in same category (excluding current business)
-    related_businesses = Business.objects.filter(
-        category=business.category
-    ).exclude(
-        pk=business.pk
-    ).annotate(
-        avg_rating=Avg('reviews__rating', filter=Q(reviews__is_approved=True))
-    ).order_by('-avg_rating')[:3]  # Top 3 rated related businesses
+    # Top 3 precomputed related businesses (see directory.related)
+    related_businesses = business.get_related_businesses(limit=3)
     
     context = {
         'business': business,
         'today_weekday': today_weekday_adjusted,  # Use adjusted value in template
         'today_hours': today_hours,
+        'business_hours': business_hours,
         'related_businesses': related_businesses,
         'user_review': user_review,
     }
-    return render(request, 'directory/business_detail.html', context)
+    response = render(request, 'directory/business_detail.html', context)
+    if cacheable:
+        store_page(business, response)
+    return response
 
+@cache_control(public=True, max_age=SUGGESTIONS_MAX_AGE)
+@condition(etag_func=search_suggestions_etag)
 def search_suggestions(request):
     """AJAX endpoint for search suggestions"""
     term = request.GET.get('term', '')
     suggestion_type = request.GET.get('type', 'search')
     
     if suggestion_type == 'categories':
-        # Return all categories with business count
-        from django.db.models import Count
-        categories = Category.objects.annotate(
-            business_count=Count('business', filter=Q(business__is_active=True))
-        ).filter(business_count__gt=0).order_by('name')
-        
+        # Categories that have active businesses, from the cached catalogue
         suggestions = [
             {
                 'id': category.id,
                 'name': category.name,
                 'business_count': category.business_count
             }
-            for category in categories
+            for category in catalogue_categories() if category.business_count > 0
         ]
     else:
-        # Existing search suggestions logic
-        businesses = Business.objects.filter(
-            Q(name__icontains=term) | Q(description__icontains=term),
-            is_active=True
-        )[:10]
-        
-        suggestions = [
-            {'label': business.name, 'value': business.name}
-            for business in businesses
-        ]
+        # Business, category and service names from the in-process index
+        suggestions = get_suggestions(term, limit=10)
     
     return JsonResponse(suggestions, safe=False)
 
+@cache_control(public=True, max_age=SUGGESTIONS_MAX_AGE)
+@condition(etag_func=location_suggestions_etag)
 def location_suggestions(request):
     """Enhanced location suggestions for location search"""
     term = request.GET.get('term', '')
@@ -167,87 +149,32 @@ def location_suggestions(request):
     if not term or len(term) < 2:
         return JsonResponse([], safe=False)
     
-    suggestions = []
-    
-    # Get unique cities with business count
-    cities = Business.objects.filter(
-        Q(city__icontains=term) & Q(is_active=True)
-    ).values('city').annotate(
-        business_count=Count('id')
-    ).order_by('-business_count', 'city')[:5]
-    
-    for city in cities:
-        suggestions.append(f"{city['city']} ({city['business_count']} businesses)")
-    
-    # Get popular areas/localities from addresses
-    areas = Business.objects.filter(
-        Q(address__icontains=term) & Q(is_active=True)
-    ).exclude(
-        city__icontains=term  # Don't duplicate cities
-    ).values_list('address', flat=True)[:3]
-    
-    # Extract area names from addresses (simple extraction)
-    for address in areas:
-        # Try to extract area name (words that contain the search term)
-        words = address.split(',')
-        for word in words:
-            word = word.strip()
-            if term.lower() in word.lower() and len(word) > len(term):
-                suggestions.append(word[:50])  # Limit length
-                break
-    
-    # Get states if searching for state names
-    if len(term) >= 3:
-        states = Business.objects.filter(
-            Q(state__icontains=term) & Q(is_active=True)
-        ).values('state').annotate(
-            business_count=Count('id')
-        ).order_by('-business_count', 'state')[:2]
-        
-        for state in states:
-            suggestions.append(f"{state['state']} State ({state['business_count']} businesses)")
-    
-    # Remove duplicates while preserving order
-    unique_suggestions = list(dict.fromkeys(suggestions))[:8]
-    
-    return JsonResponse(unique_suggestions, safe=False)
+    # Cities, areas and states with business counts from the gazetteer
+    return JsonResponse(locality_suggestions(term), safe=False)
 
+@cache_control(public=True, max_age=SUGGESTIONS_MAX_AGE)
+@condition(etag_func=category_suggestions_etag)
 def category_suggestions(request):
-    categories = Category.objects.all().values('id', 'name')
-    return JsonResponse(list(categories), safe=False)
+    categories = [{'id': category.id, 'name': category.name} for category in catalogue_categories()]
+    return JsonResponse(categories, safe=False)
 
+@cache_control(public=True, max_age=SUGGESTIONS_MAX_AGE)
+@condition(etag_func=pincode_suggestions_etag)
 def pincode_suggestions(request):
-    query = request.GET.get('term', '')
+    query = request.GET.get('term', '').strip()
     if not query:
         return JsonResponse([], safe=False)
     
-    # Get unique pincodes that match the query
-    pincodes = Business.objects.filter(
-        pincode__startswith=query  # Fixed: using = instead of parentheses
-    ).values_list('pincode', flat=True).distinct()[:10]
+    # Pincodes of active listings from the in-memory prefix index
+    pincodes = [pincode for pincode, _ in pincode_index.suggestions(query, limit=10)]
     
-    return JsonResponse(list(pincodes), safe=False)
+    return JsonResponse(pincodes, safe=False)
 
 # Add this view function
 def categories(request):
     """View for browsing all categories"""
-    categories = Category.objects.all().order_by('name')
-    
-    # Create a dictionary organized by first letter
-    categorized = {}
-    total_businesses = 0
-    
-    for category in categories:
-        first_letter = category.name[0].upper()
-        if first_letter not in categorized:
-            categorized[first_letter] = []
-        categorized[first_letter].append(category)
-    
-    # Count businesses in each category
-    for letter in categorized:
-        for category in categorized[letter]:
-            category.business_count = Business.objects.filter(category=category, is_active=True).count()
-            total_businesses += category.business_count
+    # Letter-grouped categories with active business counts
+    categorized, total_businesses = get_category_catalogue()
     
     return render(request, 'directory/categories.html', {
         'categorized': categorized,
@@ -257,170 +184,52 @@ def categories(request):
 def listings(request):
     """View for all business listings with filters"""
     
-    # Base queryset with optimized queries
-    businesses = Business.objects.filter(is_active=True).select_related('category', 'owner').prefetch_related('services', 'reviews')
-    
-    # Add this annotation to calculate approved reviews count
-    businesses = businesses.annotate(
-        avg_rating=Avg('reviews__rating', filter=Q(reviews__is_approved=True)),
-        approved_reviews_count=Count('reviews', filter=Q(reviews__is_approved=True))
-    ).order_by('-created_at')
-    
-    # Apply filters
-    category_ids = request.GET.get('category')
-    if category_ids:
-        try:
-            # Handle multiple categories separated by commas
-            if ',' in category_ids:
-                category_list = [int(cat_id.strip()) for cat_id in category_ids.split(',') if cat_id.strip()]
-                businesses = businesses.filter(category_id__in=category_list)
-            else:
-                # Single category
-                businesses = businesses.filter(category_id=int(category_ids))
-        except (ValueError, TypeError):
-            # Invalid category ID, ignore the filter
-            pass
-    
-    # FIXED: Rating filter for EXACT star rating
-    rating = request.GET.get('rating')
-    if rating:
-        try:
-            rating_int = int(rating)
-            businesses = businesses.filter(
-                avg_rating__gte=rating_int - 0.5,
-                avg_rating__lt=rating_int + 0.5
-            )
-        except ValueError:
-            pass
-    
-    # NEW: Geographic Location Search with Radius
-    lat = request.GET.get('lat')
-    lng = request.GET.get('lng')
-    radius = request.GET.get('radius', 50)  # Default 50km radius
-    location_query = request.GET.get('location')
-    
-    if lat and lng:
-        # Convert to float
-        try:
-            user_lat = float(lat)
-            user_lng = float(lng)
-            search_radius = float(radius)
-            
-            # Haversine formula for distance calculation
-            businesses = businesses.filter(
-                latitude__isnull=False,
-                longitude__isnull=False
-            ).annotate(
-                distance_km=ExpressionWrapper(
-                    6371 * 2 * ATan2(
-                        Sqrt(
-                            Sin(Radians(F('latitude') - user_lat) / 2) ** 2 +
-                            Cos(Radians(user_lat)) * Cos(Radians(F('latitude'))) *
-                            Sin(Radians(F('longitude') - user_lng) / 2) ** 2
-                        ),
-                        Sqrt(1 - (
-                            Sin(Radians(F('latitude') - user_lat) / 2) ** 2 +
-                            Cos(Radians(user_lat)) * Cos(Radians(F('latitude'))) *
-                            Sin(Radians(F('longitude') - user_lng) / 2) ** 2
-                        ))
-                    ),
-                    output_field=FloatField()
-                )
-            ).filter(
-                distance_km__lte=search_radius
-            ).order_by('distance_km', '-created_at')  # Order by distance first
-            
-            print(f"Geographic search: {businesses.count()} businesses found within {radius}km of ({lat}, {lng})")
-            
-        except (ValueError, TypeError):
-            print("Invalid coordinates provided")
-    
-    elif location_query:
-        # Fallback: Text-based location search (as backup)
-        location_query = location_query.strip()
-        
-        # Search in multiple location fields for broader matching
-        location_filter = Q()
-        
-        # Split location query into words for better matching
-        location_words = location_query.split()
-        
-        for word in location_words:
-            if len(word) >= 2:  # Only search words with 2+ characters
-                location_filter |= (
-                    Q(city__icontains=word) |
-                    Q(address__icontains=word) |
-                    Q(formatted_address__icontains=word) |
-                    Q(pincode__icontains=word) |
-                    Q(state__icontains=word)
-                )
-        
-        # If no words found, search the whole query
-        if not location_words:
-            location_filter = (
-                Q(city__icontains=location_query) |
-                Q(address__icontains=location_query) |
-                Q(formatted_address__icontains=location_query) |
-                Q(pincode__icontains=location_query) |
-                Q(state__icontains=location_query)
-            )
-        
-        businesses = businesses.filter(location_filter).distinct()
-        print(f"Text-based location search: {businesses.count()} businesses found for '{location_query}'")
-    
-    # Rest of your existing filters...
-    pincode = request.GET.get('pincode')
-    if pincode:
-        businesses = businesses.filter(pincode__startswith=pincode)
-    
-    verification = request.GET.get('verification')
-    if verification == 'gst':
-        businesses = businesses.filter(gst_verified=True)
-    elif verification == 'kyc':
-        businesses = businesses.filter(kyc_status='completed')
-    elif verification == 'both':
-        businesses = businesses.filter(gst_verified=True, kyc_status='completed')
-    
-    search_query = request.GET.get('query')
-    if search_query:
-        businesses = businesses.filter(
-            Q(name__icontains=search_query) | 
-            Q(description__icontains=search_query) |
-            Q(services__name__icontains=search_query)
-        ).distinct()
+    # One canonical filter spec drives results, facets and pagination
+    listing = ListingQuery.from_params(request.GET)
+    if listing.geo:
+        logger.debug(f"Geographic search within {listing.geo[2]}km of {listing.geo[:2]}")
     
     # Get all categories for the filter sidebar
     categories = Category.objects.all()
     
-    # ADDED: Calculate rating counts for dropdown
-    from django.db.models import Case, When, IntegerField
-    
-    rating_counts = {}
-    for i in range(1, 6):
-        count = Business.objects.filter(is_active=True).annotate(
-            avg_rating=Avg('reviews__rating', filter=Q(reviews__is_approved=True))
-        ).filter(
-            avg_rating__gte=i - 0.5,
-            avg_rating__lt=i + 0.5
-        ).count()
-        rating_counts[i] = count
-    
-    # Pagination
-    paginator = Paginator(businesses, 12)
+    # Facet counts cover every applied filter except rating itself, so the
+    # rating dropdown keeps showing the alternatives
+    unrated = listing.without_rating()
+    facets = get_listing_facets(unrated.queryset(), unrated.as_params())
+    rating_counts = facets['rating']
+    
+    # Pagination over the cached ordered rows; cards come from the fragment
+    # cache and only the businesses without one are hydrated
+    paginator = Paginator(listing.results(), 12)
     page_number = request.GET.get('page', 1)
     page_obj = paginator.get_page(page_number)
+    rows = page_obj.object_list
+    cards = business_cards(
+        [row[-1] for row in rows],
+        lambda business_ids: listing.hydrate([row for row in rows if row[-1] in business_ids]),
+    )
     
     # Prepare current filters for maintaining state
     current_filters = {}
-    for param in ['category', 'rating', 'verification', 'query', 'location', 'lat', 'lng', 'radius']:
+    for param in ['category', 'rating', 'verification', 'open', 'query', 'location', 'lat', 'lng', 'radius']:
         if request.GET.get(param):
             current_filters[param] = request.GET.get(param)
     
+    # Infinite scroll continues from the last rendered card
+    next_cursor = ''
+    if page_obj.has_next() and rows:
+        next_cursor = encode_cursor(rows[-1])
+    
     context = {
         'page_obj': page_obj,
+        'desktop_cards': cards['desktop'],
+        'mobile_cards': cards['mobile'],
+        'next_cursor': next_cursor,
         'categories': categories,
         'current_filters': current_filters,
         'rating_counts': rating_counts,  # ADDED: Rating counts for dropdown
+        'category_counts': facets['category'],
+        'verification_counts': facets['verification'],
     }
     
     return render(request, 'directory/listings.html', context)
@@ -597,8 +406,7 @@ def dashboard_home(request):
     
     # Only calculate stats for business owners
     if hasattr(request.user, 'profile') and request.user.profile.is_business_owner:
-        # Count premium listings using the existing property
-        premium_listings_count = sum(1 for business in businesses if business.has_premium_features)
+        premium_listings_count = premium_businesses(businesses).count()
         
         # Get all lead sources
         enquiries_count = Enquiry.objects.filter(business__owner=request.user).count()
@@ -1331,88 +1139,70 @@ from django.template.loader import render_to_string
 from django.http import JsonResponse
 
 @require_http_methods(["GET"])
+@cache_control(public=True, max_age=0, s_maxage=LISTINGS_MAX_AGE)
+@condition(etag_func=listings_ajax_etag)
 def listings_ajax(request):
     """AJAX endpoint for infinite scroll"""
-    page = request.GET.get('page', 1)
+    # Same filter spec and cached results as the main listings view, already
+    # resolved for the ETag
+    listing, page_obj, rows, has_next = listings_ajax_page(request)
+    
+    if page_obj is not None:
+        # Page-number mode for older clients
+        return cards_response({
+            'businesses': listing.cards(rows),
+            'has_next': has_next,
+            'current_page': page_obj.number,
+            'total_pages': page_obj.paginator.num_pages,
+            'total_count': page_obj.paginator.count
+        })
     
-    # Same filtering logic as your main listings view
-    businesses = Business.objects.filter(is_active=True).select_related('category', 'owner').prefetch_related('services', 'reviews')
+    # Keyset mode: continue after the cursor row, no OFFSET
+    return cards_response({
+        'businesses': listing.cards(rows),
+        'has_next': has_next,
+        'next_cursor': encode_cursor(rows[-1]) if has_next else None,
+        'current_page': None,
+        'total_pages': None,
+        'total_count': len(listing.results()),
+    })
+
+@require_http_methods(["GET"])
+def nearby_api(request):
+    """JSON list of the businesses nearest to a point"""
+    try:
+        user_lat, user_lng = clean_coordinates(request.GET['lat'], request.GET['lng'])
+        limit = min(max(int(request.GET.get('k', 10)), 1), 50)
+        radius = clean_radius(request.GET['radius']) if request.GET.get('radius') else None
+        category_ids = [
+            int(cat_id) for cat_id in request.GET.get('category', '').split(',') if cat_id.strip()
+        ] or None
+    except (KeyError, ValueError, TypeError):
+        return JsonResponse({'error': 'lat and lng are required'}, status=400)
+    
+    if radius is not None:
+        hits = nearby_engine.within_radius(user_lat, user_lng, radius, category_ids, limit=limit)
+    else:
+        hits = nearby_engine.nearest(user_lat, user_lng, limit, category_ids)
     
-    businesses = businesses.annotate(
-        avg_rating=Avg('reviews__rating', filter=Q(reviews__is_approved=True)),
-        approved_reviews_count=Count('reviews', filter=Q(reviews__is_approved=True))
+    businesses = hydrate_hits(
+        Business.objects.filter(is_active=True).select_related('category'), hits
     )
-    
-    # Apply same filters as main view
-    category_id = request.GET.get('category')
-    if category_id:
-        businesses = businesses.filter(category_id=category_id)
-    
-    search_query = request.GET.get('query')
-    if search_query:
-        businesses = businesses.filter(
-            Q(name__icontains=search_query) | 
-            Q(description__icontains=search_query) |
-            Q(services__name__icontains=search_query)
-        ).distinct()
-    
-    rating = request.GET.get('rating')
-    if rating:
-        try:
-            rating_int = int(rating)
-            businesses = businesses.filter(
-                avg_rating__gte=rating_int - 0.5,
-                avg_rating__lt=rating_int + 0.5
-            )
-        except ValueError:
-            pass
-        
-    pincode = request.GET.get('pincode')
-    if pincode:
-        businesses = businesses.filter(pincode__startswith=pincode)
-    
-    verification = request.GET.get('verification')
-    if verification == 'gst':
-        businesses = businesses.filter(gst_verified=True)
-    elif verification == 'kyc':
-        businesses = businesses.filter(kyc_status='completed')
-    elif verification == 'both':
-        businesses = businesses.filter(gst_verified=True, kyc_status='completed')
-    elif verification == 'any':
-        businesses = businesses.filter(
-            Q(gst_verified=True) | Q(kyc_status='completed')
-        )
-    
-    # Pagination for AJAX
-    paginator = Paginator(businesses, 10)  # 10 items per load
-    page_obj = paginator.get_page(page)
-    
-    # Prepare business data
-    business_data = []
-    for business in page_obj.object_list:
-        business_data.append({
-            'id': business.id,
-            'name': business.name,
-            'description': business.description,
-            'category': business.category.name,
-            'city': business.city,
-            'pincode': business.pincode,
-            'image_url': business.get_primary_image_url(),
-            'avg_rating': business.avg_rating or 0,
-            'approved_reviews_count': business.approved_reviews_count,
-            'gst_verified': business.gst_verified,
-            'kyc_status': business.kyc_status,
-            'owner_name': business.owner.get_full_name() or business.owner.username,
-            'services': [service.name for service in business.services.all()[:5]],
-            'services_count': business.services.count(),
-        })
-    
     return JsonResponse({
-        'businesses': business_data,
-        'has_next': page_obj.has_next(),
-        'current_page': page_obj.number,
-        'total_pages': paginator.num_pages,
-        'total_count': paginator.count
+        'businesses': [
+            {
+                'id': business.id,
+                'name': business.name,
+                'category': business.category.name,
+                'city': business.city,
+                'latitude': float(business.latitude),
+                'longitude': float(business.longitude),
+                'avg_rating': business.avg_rating,
+                'distance_km': round(business.distance_km, 2),
+                'url': reverse('directory:business_detail', args=[business.id]),
+            }
+            for business in businesses
+        ]
     })
 
 # In directory/views.py - Add this new view
@@ -1425,7 +1215,7 @@ def dashboard_coupons(request):
     
     # Get user's businesses (only premium ones for coupon settings)
     user_businesses = Business.objects.filter(owner=request.user)
-    premium_businesses = [b for b in user_businesses if b.has_premium_features]
+    premium_user_businesses = premium_businesses(user_businesses)
     
     coupon_requests = CouponRequest.objects.filter(business__owner=request.user).order_by('-created_at')
     
@@ -1436,7 +1226,7 @@ def dashboard_coupons(request):
     
     context = {
         'active_tab': 'coupons',
-        'user_businesses': premium_businesses,  # Add this
+        'user_businesses': premium_user_businesses,  # Add this
         'coupon_requests': coupon_requests,
         'total_coupons': total_coupons,
         'pending_coupons': pending_coupons,